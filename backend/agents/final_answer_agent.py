@@ -37,6 +37,7 @@ def final_answer_agent(state: GraphState) -> GraphState:
     query = state["query"]
     route = state.get("route", "rag")
     history = state.get("conversation_history", [])
+    summary = state.get("conversation_summary")
     
     # For general route, use the direct response from general_agent
     if route == "general":
@@ -52,9 +53,13 @@ def final_answer_agent(state: GraphState) -> GraphState:
     
     # Build context string with history if available
     context_with_history = fused_context
-    if history:
-        history_text = "\n\nPrevious conversation:\n"
-        for msg in history[-6:]:  # Last 3 exchanges
+    if history or summary:
+        history_text = ""
+        if summary:
+            history_text += f"\n\nSummary of earlier conversation:\n{summary}\n"
+        if history:
+            history_text += "\n\nPrevious conversation:\n"
+        for msg in history:  # Already trimmed to the context token budget
             role_label = "User" if msg["role"] == "user" else "Assistant"
             history_text += f"{role_label}: {msg['content']}\n"
         context_with_history = history_text + "\n" + fused_context
@@ -8,7 +8,7 @@ from config.langchain_config import get_langchain_llm
 from utils.logger import logger
 
 # Initialize LangChain LLM
-llm = get_langchain_llm(temperature=0.5)
+llm = get_langchain_llm(temperature=0.5, priority="fusion")
 
 # Create fusion prompt
 fusion_prompt = ChatPromptTemplate.from_messages([
@@ -33,6 +33,18 @@ Create a unified, structured summary that:
 Synthesized Context:""")
 ])
 
+def format_web_results(web_results: list) -> str:
+    """Compact text rendering of web results: title, URL, snippet and selected passages"""
+    blocks = []
+    for idx, r in enumerate(web_results, 1):
+        lines = [f"[Web {idx}] {r.get('title', '')} ({r.get('url', '')})"]
+        if r.get("snippet"):
+            lines.append(r["snippet"])
+        for passage in r.get("passages", []):
+            lines.append(f"- {passage.get('text', '')}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
 def fusion_agent(state: GraphState) -> GraphState:
     """
     Intelligently combines results from multiple agents
@@ -60,7 +72,7 @@ def fusion_agent(state: GraphState) -> GraphState:
     # Format Web context
     web_context = "None"
     if web_results:
-        web_context = f"Search results:\n{web_results}"
+        web_context = f"Search results:\n{format_web_results(web_results)}"
     
     # If only one source has data, skip LLM fusion
     sources_with_data = sum([bool(rag_results), bool(db_results), bool(web_results)])
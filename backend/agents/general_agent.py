@@ -14,6 +14,7 @@ def general_agent(state: GraphState) -> GraphState:
     """
     query = state["query"]
     history = state.get("conversation_history", [])
+    summary = state.get("conversation_summary")
     
     # Build conversation context
     system_msg = """You are a helpful AI assistant. Answer the user's question directly and concisely.
@@ -28,16 +29,18 @@ Use conversation history to maintain context and remember previous exchanges."""
     
     # Create messages array with history
     messages = [{"role": "system", "content": system_msg}]
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
     
-    # Add conversation history (last 5 exchanges)
-    for msg in history[-10:]:  # Last 10 messages (5 exchanges)
+    # Add conversation history (already trimmed to the context token budget)
+    for msg in history:
         messages.append({"role": msg["role"], "content": msg["content"]})
     
     # Add current query
     messages.append({"role": "user", "content": query})
     
     try:
-        llm = get_langchain_llm(temperature=0.7)
+        llm = get_langchain_llm(temperature=0.7, priority="general")
         response = llm.invoke(messages)
         answer = response.content
         
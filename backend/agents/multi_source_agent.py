@@ -0,0 +1,56 @@
+"""
+Multi-Source Agent - RAG, DB and Web in one MCP round trip
+Sends all three tool invocations as one batch (MCP /batch endpoint, or a thread
+pool when the tools are embedded), so they run concurrently
+"""
+from graphs.state_schema import GraphState
+from services.mcp_tools import mcp_tools
+from utils.logger import logger
+from agents.rag_agent import apply_rag_response
+from agents.db_agent import apply_db_response
+from agents.web_agent import build_web_plan, apply_web_response
+
+def multi_source_agent(state: GraphState) -> GraphState:
+    """
+    Retrieves documents, database rows and web results with a single MCP batch
+    """
+    query = state["query"]
+    plan_str, planner = build_web_plan(state)
+
+    invocations = [
+        {"id": "rag", "tool": "rag", "args": {"query": query, "limit": 5}},
+        {"id": "db", "tool": "db", "args": {"query": query}},
+    ]
+    if plan_str is not None:
+        invocations.append({"id": "web", "tool": "plan", "args": {"plan": plan_str, "query": query}})
+
+    try:
+        logger.info(f"[multi_source_agent] Running MCP batch with {len(invocations)} invocations")
+        results = {r["id"]: r for r in mcp_tools.batch(invocations)}
+    except Exception as e:
+        logger.error(f"[multi_source_agent] MCP batch call failed: {e}", exc_info=True)
+        error = f"MCP service unavailable: {str(e)}"
+        results = {inv["id"]: {"success": False, "error": error} for inv in invocations}
+
+    state.setdefault("debug", {})["mcp_batch_ms"] = {key: item.get("elapsed_ms") for key, item in results.items()}
+
+    def tool_data(key: str) -> dict:
+        item = results.get(key) or {"success": False, "error": "missing from batch response"}
+        return item.get("result") or {"success": False, "error": item.get("error") or "Unknown error"}
+
+    try:
+        apply_rag_response(state, tool_data("rag"))
+    except Exception as e:
+        logger.error(f"[multi_source_agent] RAG answer failed: {e}", exc_info=True)
+        state["rag_results"] = []
+        state.setdefault("debug", {})["rag_error"] = str(e)
+
+    apply_db_response(state, tool_data("db"))
+
+    if plan_str is not None:
+        web_data = tool_data("web")
+        if web_data.get("error"):
+            logger.warning(f"[multi_source_agent] Web plan failed: {web_data['error']}")
+        apply_web_response(state, web_data, plan_str, planner)
+
+    return state
@@ -13,7 +13,7 @@ from utils.logger import logger
 import re
 
 # Initialize LangChain LLM
-llm = get_langchain_llm(temperature=0.1)
+llm = get_langchain_llm(temperature=0.1, priority="router")
 
 # Define output structure for router
 class RouteDecision(BaseModel):
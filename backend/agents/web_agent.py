@@ -1,37 +1,65 @@
+import json
 import httpx
 from graphs.state_schema import GraphState
 from utils.helpers import load_prompt
 from config.langchain_config import get_langchain_llm
 from config.settings import settings
 from utils.logger import logger
+from agents.web_planner import plan_web_queries
+from services.mcp_tools import mcp_tools
 from langchain_core.prompts import ChatPromptTemplate
 
-def web_agent(state: GraphState) -> GraphState:
+def build_web_plan(state: GraphState):
+    """
+    Build the web search plan for the query
+
+    Returns:
+        (plan_str, planner) where planner is "rule" or "llm"; plan_str is None
+        when the LLM planner failed (web_results/debug are set on the state)
+    """
     query = state["query"]
-    plan_prompt_text = load_prompt("web").format(query=query)
+    mode = settings.WEB_PLANNER_MODE.lower()
+
+    # Rule-based plan first; only complex questions (or mode=llm) pay for a planning LLM call
+    rule_plan = plan_web_queries(query) if mode in ("rule", "auto") else None
+    if rule_plan is None and mode == "rule":
+        rule_plan = {"queries": [query[:200]], "goal": query, "planner": "rule"}
 
-    llm = get_langchain_llm(temperature=0.7)
+    if rule_plan is not None:
+        plan_str = json.dumps(rule_plan)
+        logger.info(f"[web_agent] Rule plan: {plan_str}")
+        return plan_str, "rule"
+
+    plan_prompt_text = load_prompt("web").format(query=query)
+    llm = get_langchain_llm(temperature=0.7, priority="planning")
     messages = [{"role": "system", "content": plan_prompt_text}]
     
     try:
         response = llm.invoke(messages)
         plan_str = response.content
         logger.info(f"[web_agent] LLM plan: {plan_str}")
+        return plan_str, "llm"
     except Exception as e:
         logger.exception(f"[web_agent] LLM call failed: {e}")
         state["web_results"] = []  # type: ignore
         state.setdefault("debug", {})["web_error"] = str(e)
+        return None, "llm"
+
+def apply_web_response(state: GraphState, data: dict, plan_str: str, planner: str) -> GraphState:
+    """Store an MCP /plan response on the state"""
+    state["web_results"] = data.get("results", [])  # type: ignore
+    state.setdefault("debug", {})["web_plan"] = plan_str
+    state.setdefault("debug", {})["web_planner"] = planner
+    return state
+
+def web_agent(state: GraphState) -> GraphState:
+    query = state["query"]
+    plan_str, planner = build_web_plan(state)
+    if plan_str is None:
         return state
 
     try:
-        # Web searches can take time - increase timeout to 60s
-        with httpx.Client(timeout=60.0) as http_client:
-            plan_resp = http_client.post(
-                f"{settings.MCP_SERVICE_URL}/plan",
-                json={"plan": plan_str},
-            )
-            plan_resp.raise_for_status()
-            data = plan_resp.json()
+        data = mcp_tools.plan(plan_str, query)
     except httpx.ReadTimeout:
         logger.warning(f"[web_agent] MCP call timed out after 60s - web searches may be slow")
         data = {"results": [], "error": "timed out"}
@@ -39,6 +67,4 @@ def web_agent(state: GraphState) -> GraphState:
         logger.error(f"[web_agent] MCP call failed: {e}")
         data = {"results": [], "error": str(e)}
 
-    state["web_results"] = data.get("results", [])  # type: ignore
-    state.setdefault("debug", {})["web_plan"] = plan_str
-    return state
+    return apply_web_response(state, data, plan_str, planner)
@@ -0,0 +1,142 @@
+"""
+Rule-based Web Query Planner
+Builds the web search plan locally (keywords, domains, conjunction splits)
+so simple questions skip the planning LLM call
+"""
+import re
+from typing import Dict, Any, List, Optional
+
+MAX_QUERIES = 3
+MAX_WORDS = 20
+
+DOMAIN_PATTERN = re.compile(
+    r'\b((?:[a-z0-9-]+\.)+(?:com|org|net|io|ai|co|dev|gov|edu|app|info|us|uk|in|de))\b',
+    re.IGNORECASE,
+)
+
+# Leading phrases that carry no search value
+FILLER_PATTERN = re.compile(
+    r'^(?:please\s+)?(?:can you\s+|could you\s+)?(?:tell me (?:about|what)|search (?:the web )?for|look up|find(?: out)?|'
+    r'what (?:is|are|was|were)|who (?:is|are)|give me(?: info(?:rmation)? (?:on|about))?|show me|i want to know(?: about)?)\s+',
+    re.IGNORECASE,
+)
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "by", "about", "is", "are", "was", "were",
+    "me", "please", "tell", "what", "who", "which", "does", "do", "can", "could", "you",
+    "with", "from", "at", "it", "its", "their", "this", "that", "some", "any", "website", "site",
+    "compare",
+}
+
+# Separators that end one question and start another
+SPLIT_PATTERN = re.compile(r'\s*(?:;|\?|\band also\b|\bas well as\b)\s*', re.IGNORECASE)
+# Bare conjunctions also join parts of one subject ("salt and pepper", "pricing and features");
+# split on them only when every side names an entity
+CONJUNCTION_PATTERN = re.compile(r'\s+(?:and|vs\.?|versus)\s+', re.IGNORECASE)
+LEADING_CONJUNCTION = re.compile(r'^(?:and|also|or)\s+', re.IGNORECASE)
+
+# Words that say what to look up about a subject but are not a subject themselves
+ATTRIBUTE_WORDS = {
+    "and", "or", "also", "vs", "versus", "compare", "comparison", "difference", "between",
+    "price", "prices", "pricing", "cost", "costs", "features", "feature", "review", "reviews",
+    "news", "latest", "update", "updates", "release", "date", "specs", "details", "info",
+    "information", "overview", "alternatives", "availability", "how", "when", "where", "much",
+}
+
+# Phrasing that asks for reasoning rather than lookup; leave these to the LLM planner
+COMPLEX_PATTERN = re.compile(
+    r'\b(why|explain|pros and cons|impact|affect|implications?|step by step|strategy|should i|recommend)\b',
+    re.IGNORECASE,
+)
+
+
+def _keywords(text: str) -> str:
+    text = FILLER_PATTERN.sub("", text.strip())
+    words = re.findall(r"[A-Za-z0-9][A-Za-z0-9'+#.-]*", text)
+    return " ".join(w.strip(".") for w in words if w.lower().strip(".") not in STOPWORDS)
+
+
+def _subject_words(part: str) -> List[str]:
+    """Keywords of part that name a subject (not attribute or filler words)"""
+    return [w for w in _keywords(part).split() if w.lower() not in ATTRIBUTE_WORDS]
+
+
+def _has_entity(part: str) -> bool:
+    """True if part names a specific thing: a domain, a capitalized name, an acronym or a number"""
+    if DOMAIN_PATTERN.search(part):
+        return True
+    return any(w[0].isupper() or w[0].isdigit() for w in _subject_words(part))
+
+
+def _split_parts(query: str) -> List[str]:
+    """
+    Split a multi-part question into self-contained parts
+
+    Parts without a subject ("and pricing?") are folded into the previous part, and a part is
+    split on and/vs only when every side names an entity ("AWS vs Azure", not "salt and pepper").
+    """
+    parts: List[str] = []
+    for part in SPLIT_PATTERN.split(query):
+        part = LEADING_CONJUNCTION.sub("", part.strip())
+        if not part or not _keywords(part):
+            continue
+        if parts and not _subject_words(part):
+            parts[-1] = f"{parts[-1]} {part}"
+            continue
+        sides = CONJUNCTION_PATTERN.split(part)
+        if len(sides) > 1 and all(_has_entity(side) for side in sides):
+            parts.extend(sides)
+        else:
+            parts.append(part)
+    return parts
+
+
+def _domain_queries(part: str, with_site: bool) -> List[str]:
+    domains = [d.lower() for d in DOMAIN_PATTERN.findall(part)]
+    if not domains:
+        return []
+    rest = _keywords(DOMAIN_PATTERN.sub(" ", part))
+    queries = []
+    for domain in domains:
+        brand = domain.split(".")[-2]
+        queries.append(f"{brand} {rest}".strip() if rest else f"{brand} company overview")
+        if with_site:
+            queries.append(f"site:{domain} {rest}".strip())
+    return queries
+
+
+def plan_web_queries(query: str) -> Optional[Dict[str, Any]]:
+    """
+    Build a web search plan without an LLM call
+
+    Returns:
+        {"queries": [...], "goal": query, "planner": "rule"}, or None when the
+        question looks too complex and should go to the LLM planner
+    """
+    if len(query.split()) > MAX_WORDS or COMPLEX_PATTERN.search(query):
+        return None
+
+    # Split multi-part questions on question marks, separators and entity conjunctions
+    parts = _split_parts(query)
+
+    queries: List[str] = []
+    if len(parts) > 1:
+        # Lead with the whole question so comparisons ("AWS vs Azure") are also searched together
+        full = _keywords(DOMAIN_PATTERN.sub(lambda m: m.group(1).split(".")[-2], query))
+        if full:
+            queries.append(full)
+
+    for part in parts:
+        domain_queries = _domain_queries(part, with_site=len(parts) == 1)
+        if domain_queries:
+            queries.extend(domain_queries)
+            continue
+        keywords = _keywords(part)
+        if keywords:
+            queries.append(keywords)
+
+    deduped = list(dict.fromkeys(q for q in queries if q))
+    # More queries than slots: let the LLM planner decide what to drop instead of truncating
+    if not deduped or len(deduped) > MAX_QUERIES:
+        return None
+    return {"queries": deduped, "goal": query, "planner": "rule"}
@@ -1,15 +1,21 @@
-from fastapi import APIRouter
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from api.schemas import ChatRequest, ChatResponse, SourceAttribution
 from graphs.multi_agent_graph import graph_app
 from graphs.state_schema import GraphState
 from services.memory_service import memory_service
+from services.retention_worker import retention_worker
+from services.llm_scheduler import llm_user, llm_scheduler_stats
+from services.database import pool_stats
 
 router = APIRouter()
 
 @router.post("/chat", response_model=ChatResponse)
 def chat(req: ChatRequest):
-    # Get conversation history
-    history = memory_service.get_history(req.user_id, limit=5)  # Last 5 exchanges
+    # Get conversation context: rolling summary + recent turns within the token budget
+    context = memory_service.get_context(req.user_id)
     
     # Add current user message to memory
     memory_service.add_message(req.user_id, "user", req.message)
@@ -18,9 +24,12 @@ def chat(req: ChatRequest):
     init_state: GraphState = {
         "user_id": req.user_id,
         "query": req.message,
-        "conversation_history": history,  # type: ignore
+        "conversation_history": context["messages"],  # type: ignore
+        "conversation_summary": context["summary"],
     }
 
+    # LLM calls made while answering are scheduled fairly per user
+    llm_user.set(req.user_id)
     final_state = graph_app.invoke(init_state)
 
     answer = final_state.get("answer", "")
@@ -45,15 +54,39 @@ def chat(req: ChatRequest):
         debug=debug or None,
     )
 
+@router.get("/llm/stats")
+def get_llm_stats():
+    """LLM scheduler metrics: in-flight calls, queue depth and wait times per priority class"""
+    return llm_scheduler_stats()
+
+@router.get("/db/stats")
+def get_db_stats():
+    """Database pool metrics: checkout wait times, timeouts and saturation per engine"""
+    return pool_stats()
+
+@router.get("/history-cache/stats")
+def get_history_cache_stats():
+    """In-process history cache metrics: hit ratio, size and invalidations"""
+    return memory_service.cache_stats()
+
 @router.get("/history/{user_id}")
-def get_history(user_id: str, limit: int = 10):
+def get_history(user_id: str, limit: int = 10, cursor: Optional[str] = None):
     """
-    Get conversation history for a user
+    Get conversation history for a user, newest page first
+    Pass next_cursor back as `cursor` to get the preceding page (null when there is none)
     
     Note: Conversations are automatically deleted after 30 days of inactivity
     """
-    history = memory_service.get_history(user_id, limit=limit)
-    return {"user_id": user_id, "history": history, "count": len(history)}
+    try:
+        page = memory_service.get_history_page(user_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "user_id": user_id,
+        "history": page["history"],
+        "count": len(page["history"]),
+        "next_cursor": page["next_cursor"],
+    }
 
 @router.delete("/history/{user_id}")
 def clear_history(user_id: str):
@@ -61,17 +94,34 @@ def clear_history(user_id: str):
     memory_service.clear_history(user_id)
     return {"status": "success", "message": f"History cleared for user {user_id}"}
 
+@router.get("/admin/history/export")
+def export_history(user_id: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Admin endpoint: Stream stored conversation history as NDJSON (one message per line, oldest first)
+    Optional filters: user_id, since/until (created_at, ISO 8601)
+    """
+    return StreamingResponse(
+        memory_service.export_history(user_id=user_id, since=since, until=until),
+        media_type="application/x-ndjson",
+    )
+
 @router.post("/admin/cleanup-history")
 def cleanup_old_history(days: int = 30):
     """
     Admin endpoint: Delete conversations older than specified days
     Default: 30 days
-    
-    This should be called periodically (e.g., daily cron job)
+
+    Starts a retention pass in the background (the retention worker also runs one every
+    HISTORY_RETENTION_INTERVAL_SECONDS); follow progress on GET /admin/retention
     """
-    deleted_count = memory_service.cleanup_old_conversations(days=days)
+    started = retention_worker.trigger(days)
     return {
-        "status": "success",
-        "deleted_count": deleted_count,
-        "message": f"Deleted conversations older than {days} days"
+        "status": "started" if started else "already_running",
+        "message": f"Deleting conversations older than {days} days",
+        "retention": retention_worker.status(),
     }
+
+@router.get("/admin/retention")
+def get_retention_status():
+    """Retention worker progress: phase, rows deleted, rows/sec, partitions dropped, users evicted"""
+    return retention_worker.status()
@@ -0,0 +1,96 @@
+"""
+Microbenchmark: Redis history cache operations, previous implementation vs current
+
+Previous: RPUSH + LTRIM + EXPIRE per append, DEL + one RPUSH per item on set,
+LRANGE 0 -1 (whole list) on every read.
+Current: one Lua call per append, one MULTI pipeline per set, tail-only LRANGE.
+
+Needs only Redis: the cache tier is built on its own, so no PostgreSQL tables, write-behind
+or summarizer threads are involved. Use a scratch database; the bench keys are deleted.
+
+Usage (from backend/, against a running Redis):
+    REDIS_URL=redis://localhost:6379/15 python bench_history_cache.py [--ops 2000] [--items 50] [--limit 5]
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from redis import Redis
+from config.settings import settings
+from services.redis_history_cache import RedisHistoryCache
+
+
+def legacy_append(redis, key: str, max_items: int, ttl: int):
+    payload = {"role": "user", "content": "How many orders were placed last week?", "timestamp": datetime.utcnow().isoformat()}
+    redis.rpush(key, json.dumps(payload))
+    redis.ltrim(key, -max_items, -1)
+    redis.expire(key, ttl)
+
+
+def legacy_set(redis, key: str, history: list, ttl: int):
+    redis.delete(key)
+    for item in history:
+        redis.rpush(key, json.dumps(item))
+    redis.expire(key, ttl)
+
+
+def legacy_read(redis, key: str, limit: int) -> list:
+    history = [json.loads(item) for item in redis.lrange(key, 0, -1)]
+    return history[-limit:]
+
+
+def timed(fn, ops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=settings.REDIS_HISTORY_MAX_ITEMS)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    if not settings.REDIS_URL:
+        raise SystemExit("REDIS_URL is not set")
+    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        redis.ping()
+    except Exception as e:
+        raise SystemExit(f"Redis is unreachable: {e}")
+
+    ttl = settings.REDIS_HISTORY_TTL_SECONDS
+    cache = RedisHistoryCache(redis, ttl, args.items)
+    history = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message number {i} " * 8,
+         "timestamp": datetime.utcnow().isoformat()}
+        for i in range(args.items)
+    ]
+    legacy_key, user_id = "bench:legacy_history", "bench_user"
+    current_key = cache.key(user_id)
+
+    results = [
+        ("set", timed(lambda: legacy_set(redis, legacy_key, history, ttl), args.ops // 10 or 1),
+         timed(lambda: cache.set(user_id, history), args.ops // 10 or 1)),
+        ("append", timed(lambda: legacy_append(redis, legacy_key, args.items, ttl), args.ops),
+         timed(lambda: cache.append(user_id, "user", "How many orders were placed last week?",
+                                    datetime.utcnow()), args.ops)),
+        (f"read last {args.limit}", timed(lambda: legacy_read(redis, legacy_key, args.limit), args.ops),
+         timed(lambda: cache.tail(user_id, args.limit), args.ops)),
+    ]
+
+    legacy_bytes = sum(len(item) for item in redis.lrange(legacy_key, 0, -1))
+    current_bytes = sum(len(item) for item in redis.lrange(current_key, 0, -1))
+    redis.delete(legacy_key, current_key)
+
+    print(f"History items: {args.items}, ops: {args.ops}")
+    print(f"{'operation':<14}{'previous us/op':>16}{'current us/op':>16}{'speedup':>10}")
+    for name, legacy_us, current_us in results:
+        print(f"{name:<14}{legacy_us:>16.1f}{current_us:>16.1f}{legacy_us / current_us:>9.1f}x")
+    print(f"Cached bytes:  previous {legacy_bytes}, current {current_bytes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,52 @@
 """
 LangChain configuration and utilities
-Provides ChatOpenAI instances configured for different providers
+Provides ChatOpenAI instances configured for different providers, wrapped so that
+every call goes through the process-wide LLM scheduler
 """
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
 from config.settings import settings
+from services.llm_scheduler import get_llm_scheduler
 from typing import Optional
 
-def get_langchain_llm(temperature: float = 0.7, max_tokens: Optional[int] = None) -> ChatOpenAI:
+
+class ScheduledLLM:
+    """
+    ChatOpenAI wrapper whose invoke() waits for an admission slot of its priority class
+    Other attributes are passed through to the wrapped model
+    """
+
+    def __init__(self, llm: ChatOpenAI, priority: str, provider: str):
+        self.llm = llm
+        self.priority = priority
+        self.scheduler = get_llm_scheduler(provider)
+
+    def invoke(self, input, config=None, **kwargs):
+        with self.scheduler.slot(self.priority):
+            return self.llm.invoke(input, config, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+def get_langchain_llm(temperature: float = 0.7, max_tokens: Optional[int] = None,
+                      priority: str = "final") -> ScheduledLLM:
     """
     Get LangChain ChatOpenAI instance configured based on provider
     
     Args:
         temperature: Controls randomness (0 = deterministic, 1 = creative)
         max_tokens: Maximum tokens in response
+        priority: Scheduling class - "router", "general", "final", "fusion", "planning" or "background"
         
     Returns:
-        Configured ChatOpenAI instance
+        Configured ChatOpenAI instance behind the LLM scheduler
     """
     provider = settings.LLM_PROVIDER.lower()
+    return ScheduledLLM(_build_chat_model(provider, temperature, max_tokens), priority, provider)
+
+
+def _build_chat_model(provider: str, temperature: float, max_tokens: Optional[int]) -> ChatOpenAI:
     
     if provider == "ollama":
         # Ollama's OpenAI-compatible endpoint is at /v1
@@ -75,6 +75,29 @@ CREATE INDEX IF NOT EXISTS idx_user_sessions_token ON user_sessions(session_toke
 CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders(user_id);
 CREATE INDEX IF NOT EXISTS idx_users_last_login ON users(last_login_at);
 
+-- Notify the MCP SQL result cache when data changes
+CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('sql_cache_invalidate', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_cache_invalidate ON users;
+CREATE TRIGGER users_cache_invalidate
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON users
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+
+DROP TRIGGER IF EXISTS user_sessions_cache_invalidate ON user_sessions;
+CREATE TRIGGER user_sessions_cache_invalidate
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON user_sessions
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+
+DROP TRIGGER IF EXISTS orders_cache_invalidate ON orders;
+CREATE TRIGGER orders_cache_invalidate
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON orders
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change();
+
 -- Verify setup
 SELECT 'Users created:' as info, COUNT(*) as count FROM users
 UNION ALL
@@ -4,6 +4,7 @@ from agents.router_agent import router_agent
 from agents.rag_agent import rag_agent
 from agents.db_agent import db_agent
 from agents.web_agent import web_agent
+from agents.multi_source_agent import multi_source_agent
 from agents.fusion_agent import fusion_agent
 from agents.final_answer_agent import final_answer_agent
 from agents.general_agent import general_agent
@@ -15,6 +16,7 @@ def build_graph():
     workflow.add_node("rag", rag_agent)
     workflow.add_node("db", db_agent)
     workflow.add_node("web", web_agent)
+    workflow.add_node("multi", multi_source_agent)
     workflow.add_node("general", general_agent)
     workflow.add_node("fusion", fusion_agent)
     workflow.add_node("final", final_answer_agent)
@@ -30,7 +32,7 @@ def build_graph():
         elif route == "web":
             return "web"
         elif route == "multi":
-            return "rag"
+            return "multi"
         elif route == "general":
             return "general"
         else:
@@ -43,28 +45,17 @@ def build_graph():
             "rag": "rag",
             "db": "db",
             "web": "web",
-            "multi": "rag",
+            "multi": "multi",
             "general": "general",
             "final": "final",
         },
     )
 
-    def after_rag(state: GraphState):
-        if state.get("route") == "multi":
-            return "db"
-        return "fusion"
-
-    def after_db(state: GraphState):
-        if state.get("route") == "multi":
-            return "web"
-        return "fusion"
-
-    def after_web(state: GraphState):
-        return "fusion"
-
-    workflow.add_conditional_edges("rag", after_rag, {"db": "db", "fusion": "fusion"})
-    workflow.add_conditional_edges("db", after_db, {"web": "web", "fusion": "fusion"})
+    # Multi-source queries fetch RAG, DB and Web in one MCP batch call
+    workflow.add_edge("rag", "fusion")
+    workflow.add_edge("db", "fusion")
     workflow.add_edge("web", "fusion")
+    workflow.add_edge("multi", "fusion")
     workflow.add_edge("general", "final")  # General goes directly to final
 
     workflow.add_edge("fusion", "final")
@@ -6,6 +6,7 @@ class GraphState(TypedDict, total=False):
     user_id: str
     query: str
     conversation_history: List[dict]
+    conversation_summary: Optional[str]  # rolling summary of turns older than conversation_history
     route: Optional[Route]
     rag_results: List[dict]
     db_results: List[dict]
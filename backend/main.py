@@ -2,6 +2,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import router as api_router
 from services.memory_service import memory_service
+from services.retention_worker import retention_worker
+from services.database import dispose_async_engine
+from config.settings import settings
 from utils.logger import logger
 
 app = FastAPI(title="AI Multi-Agent Backend")
@@ -18,6 +21,18 @@ app.add_middleware(
 async def startup_event():
     logger.info("Initializing conversation history storage...")
     # Table creation is handled in memory_service.__init__()
+    if settings.HISTORY_RETENTION_ENABLED:
+        retention_worker.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    retention_worker.stop()
+    # Drain buffered conversation messages before the process exits
+    memory_service.close()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
 
 app.include_router(api_router, prefix="/api")
 
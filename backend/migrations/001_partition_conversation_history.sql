@@ -0,0 +1,64 @@
+-- Migrate an existing (unpartitioned) conversation_history table to daily range partitions
+--
+-- New deployments don't need this: MemoryService creates the partitioned table on startup.
+-- Run during a maintenance window with the backend stopped:
+--   psql "$POSTGRES_DSN" -f backend/migrations/001_partition_conversation_history.sql
+-- The old table is kept as history_archive.conversation_history_legacy, outside the public
+-- schema so the MCP NL-to-SQL tool never sees it; drop it once the copy is verified.
+-- For monthly partitions (HISTORY_PARTITION_INTERVAL=month) change the loop step and names.
+
+BEGIN;
+
+LOCK TABLE conversation_history IN ACCESS EXCLUSIVE MODE;
+
+ALTER TABLE conversation_history RENAME TO conversation_history_legacy;
+ALTER INDEX IF EXISTS idx_conversation_user_created RENAME TO idx_conversation_user_created_legacy;
+ALTER SEQUENCE IF EXISTS conversation_history_id_seq RENAME TO conversation_history_legacy_id_seq;
+
+CREATE TABLE conversation_history (
+    id BIGSERIAL,
+    user_id VARCHAR(255) NOT NULL,
+    role VARCHAR(50) NOT NULL,
+    content TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    metadata JSONB DEFAULT '{}',
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX idx_conversation_user_created
+ON conversation_history(user_id, created_at DESC);
+
+CREATE TABLE conversation_history_default PARTITION OF conversation_history DEFAULT;
+
+-- One partition per day from the oldest message through a week ahead
+-- (same names and bounds MemoryService.ensure_partitions uses)
+DO $$
+DECLARE
+    first_day DATE := COALESCE((SELECT min(created_at)::date FROM conversation_history_legacy), current_date);
+    day DATE;
+BEGIN
+    FOR day IN SELECT generate_series(first_day, current_date + 7, interval '1 day')::date LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF conversation_history FOR VALUES FROM (%L) TO (%L)',
+            'conversation_history_p' || to_char(day, 'YYYYMMDD'), day::timestamp, (day + 1)::timestamp
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO conversation_history (id, user_id, role, content, created_at, metadata)
+SELECT id, user_id, role, content, COALESCE(created_at, CURRENT_TIMESTAMP), COALESCE(metadata, '{}')
+FROM conversation_history_legacy;
+
+-- Out of public: schema introspection and generated SQL only cover public tables
+CREATE SCHEMA IF NOT EXISTS history_archive;
+ALTER TABLE conversation_history_legacy SET SCHEMA history_archive;
+
+SELECT setval(
+    pg_get_serial_sequence('conversation_history', 'id'),
+    COALESCE((SELECT max(id) FROM conversation_history), 0) + 1,
+    false
+);
+
+COMMIT;
+
+ANALYZE conversation_history;
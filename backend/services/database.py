@@ -0,0 +1,207 @@
+"""
+Shared Database Layer
+One sync engine (psycopg2) and one lazily created asyncio engine (asyncpg) per process,
+both with pools sized by DB_POOL_* settings. Every backend service uses these instead of
+calling create_engine itself, so connections per replica are bounded by
+(DB_POOL_SIZE + DB_MAX_OVERFLOW) per engine. The async engine serves async routes that
+stream from the database (MemoryService.export_history behind /api/admin/history/export).
+
+Pool checkout latency, timeouts and saturation are exposed via pool_stats().
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Tuple
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from config.settings import settings
+from utils.logger import logger
+
+
+def sync_dsn(dsn: str) -> str:
+    """Pin the psycopg2 driver for plain postgresql:// URLs"""
+    url = make_url(dsn)
+    if url.drivername in ("postgresql", "postgres"):
+        url = url.set(drivername="postgresql+psycopg2")
+    return url.render_as_string(hide_password=False)
+
+
+# libpq URL parameters asyncpg does not accept: renamed, moved to connect_args, or dropped
+ASYNCPG_RENAMED_PARAMS = {"sslmode": "ssl"}
+ASYNCPG_SERVER_SETTINGS = ("application_name", "search_path")
+
+
+def async_connect_params(dsn: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Same database through asyncpg: (URL, connect_args)
+
+    The DSN is written for libpq. asyncpg takes ssl instead of sslmode, a float timeout
+    instead of connect_timeout, and session parameters through server_settings. Parameters
+    with no asyncpg equivalent (e.g. sslrootcert) are dropped with a warning.
+    """
+    url = make_url(dsn).set(drivername="postgresql+asyncpg")
+    query, connect_args, server_settings, dropped = {}, {}, {}, []
+    for key, value in url.query.items():
+        if key in ASYNCPG_RENAMED_PARAMS:
+            query[ASYNCPG_RENAMED_PARAMS[key]] = value
+        elif key == "connect_timeout":
+            connect_args["timeout"] = float(value if isinstance(value, str) else value[-1])
+        elif key in ASYNCPG_SERVER_SETTINGS:
+            server_settings[key] = value if isinstance(value, str) else value[-1]
+        elif key in ("host", "port", "ssl", "target_session_attrs", "prepared_statement_cache_size"):
+            query[key] = value
+        else:
+            dropped.append(key)
+    if server_settings:
+        connect_args["server_settings"] = server_settings
+    if dropped:
+        logger.warning(f"[Database] Ignoring DSN parameters not supported by asyncpg: {', '.join(dropped)}")
+    return url.set(query=query).render_as_string(hide_password=False), connect_args
+
+
+class PoolMetrics:
+    """Checkout wait times and timeouts for one engine's pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits = deque(maxlen=1000)
+        self.pool = None
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.recent_waits.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self.recent_waits)
+            checkouts, timeouts, wait_total, wait_max = self.checkouts, self.timeouts, self.wait_total, self.wait_max
+
+        def pct(p: float) -> float:
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 2) if recent else 0.0
+
+        stats = {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_avg_ms": round(wait_total / checkouts * 1000, 2) if checkouts else 0.0,
+            "wait_p50_ms": pct(0.5),
+            "wait_p95_ms": pct(0.95),
+            "wait_max_ms": round(wait_max * 1000, 2),
+        }
+        pool = self.pool
+        if pool is not None:
+            # Configured overflow: the pool's own limit is not public API
+            capacity = pool.size() + max(0, settings.DB_MAX_OVERFLOW)
+            stats.update({
+                "pool_size": pool.size(),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "saturation": round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+            })
+        return stats
+
+
+def _timed_pool(base, metrics: PoolMetrics):
+    """Pool class that records how long each checkout waited (including new connection setup)"""
+
+    class TimedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                entry = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record(time.perf_counter() - start, timed_out=True)
+                logger.warning(f"[Database] {metrics.name} pool exhausted: {self.status()}")
+                raise
+            metrics.record(time.perf_counter() - start)
+            return entry
+
+    return TimedPool
+
+
+def _pool_options() -> Dict[str, Any]:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _track_pool(engine, metrics: PoolMetrics):
+    metrics.pool = engine.pool
+
+    # dispose() swaps in a fresh pool; keep reporting the live one
+    @event.listens_for(engine, "engine_disposed")
+    def _on_dispose(_):
+        metrics.pool = engine.pool
+
+
+_sync_metrics = PoolMetrics("sync")
+engine = create_engine(
+    sync_dsn(settings.POSTGRES_DSN),
+    poolclass=_timed_pool(QueuePool, _sync_metrics),
+    future=True,
+    **_pool_options(),
+)
+_track_pool(engine, _sync_metrics)
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+_async_metrics = PoolMetrics("async")
+_async_engine = None
+_async_lock = threading.Lock()
+
+
+def get_async_engine():
+    """Process-wide asyncio engine (created on first use)"""
+    global _async_engine
+    with _async_lock:
+        if _async_engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            url, connect_args = async_connect_params(settings.POSTGRES_DSN)
+            _async_engine = create_async_engine(
+                url,
+                connect_args=connect_args,
+                poolclass=_timed_pool(AsyncAdaptedQueuePool, _async_metrics),
+                **_pool_options(),
+            )
+            _track_pool(_async_engine.sync_engine, _async_metrics)
+            logger.info("[Database] Async engine ready")
+        return _async_engine
+
+
+async def dispose_async_engine():
+    global _async_engine
+    with _async_lock:
+        async_engine, _async_engine = _async_engine, None
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+def pool_stats() -> Dict[str, Any]:
+    stats = {"sync": _sync_metrics.snapshot()}
+    if _async_engine is not None:
+        stats["async"] = _async_metrics.snapshot()
+    return stats
+
+
+logger.info(
+    f"[Database] Pool: size={settings.DB_POOL_SIZE} overflow={settings.DB_MAX_OVERFLOW} "
+    f"recycle={settings.DB_POOL_RECYCLE_SECONDS}s pre_ping={settings.DB_POOL_PRE_PING}"
+)
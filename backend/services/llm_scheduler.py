@@ -0,0 +1,200 @@
+"""
+LLM Admission Control
+Process-wide scheduler that every LLM call goes through:
+- max in-flight generations per provider (LLM_MAX_IN_FLIGHT)
+- priority classes: router > general > final > fusion > planning > background
+- round-robin between users within a class, so one user's burst cannot monopolize slots
+- early load shedding when the expected queue wait exceeds LLM_QUEUE_DEADLINE_SECONDS
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
+from config.settings import settings
+from utils.logger import logger
+
+# Highest priority first
+PRIORITY_CLASSES = ("router", "general", "final", "fusion", "planning", "background")
+
+# User on whose behalf LLM calls in the current request are made (set by the chat route)
+llm_user: ContextVar[str] = ContextVar("llm_user", default="anonymous")
+
+
+class LLMOverloaded(Exception):
+    """Raised when an LLM call is shed instead of queued"""
+
+
+class _Waiter:
+    __slots__ = ("user", "event", "granted")
+
+    def __init__(self, user: str):
+        self.user = user
+        self.event = threading.Event()
+        self.granted = False
+
+
+class _ClassMetrics:
+    def __init__(self):
+        self.admitted = 0
+        self.shed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits = deque(maxlen=500)
+
+    def record_wait(self, seconds: float):
+        self.admitted += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.recent_waits.append(seconds)
+
+    def snapshot(self, queued: int) -> Dict[str, Any]:
+        recent = sorted(self.recent_waits)
+
+        def pct(p: float) -> float:
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 1) if recent else 0.0
+
+        return {
+            "queued": queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "wait_avg_ms": round(self.wait_total / self.admitted * 1000, 1) if self.admitted else 0.0,
+            "wait_p50_ms": pct(0.5),
+            "wait_p95_ms": pct(0.95),
+            "wait_max_ms": round(self.wait_max * 1000, 1),
+        }
+
+
+class LLMScheduler:
+    """
+    Priority + fair-share admission control for one LLM provider
+
+    Usage:
+        with scheduler.slot("final", user_id):
+            response = llm.invoke(messages)
+    """
+
+    def __init__(self, provider: str, max_in_flight: int, deadline: float):
+        self.provider = provider
+        self.max_in_flight = max(1, max_in_flight)
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # class -> {user: deque of waiters}; the user at the front is served next, then rotated to the back
+        self._queues: Dict[str, "OrderedDict[str, deque]"] = {c: OrderedDict() for c in PRIORITY_CLASSES}
+        self._service_ewma: Optional[float] = None
+        self._metrics = {c: _ClassMetrics() for c in PRIORITY_CLASSES}
+
+    def _queued(self, priority: str) -> int:
+        return sum(len(waiters) for waiters in self._queues[priority].values())
+
+    def _ahead_of(self, priority: str) -> int:
+        """Waiters that would be served before a new request of this class"""
+        rank = PRIORITY_CLASSES.index(priority)
+        return sum(self._queued(c) for c in PRIORITY_CLASSES[:rank + 1])
+
+    def _shed(self, priority: str, reason: str):
+        self._metrics[priority].shed += 1
+        logger.warning(f"[LLMScheduler] Shedding {priority} call ({self.provider}): {reason}")
+        raise LLMOverloaded(f"LLM {self.provider} overloaded: {reason}")
+
+    def _acquire(self, priority: str, user: str):
+        with self._lock:
+            if self._in_flight < self.max_in_flight:
+                self._in_flight += 1
+                self._metrics[priority].record_wait(0.0)
+                return
+            if self._service_ewma is not None:
+                expected = (self._ahead_of(priority) + 1) / self.max_in_flight * self._service_ewma
+                if expected > self.deadline:
+                    self._shed(priority, f"expected wait {expected:.1f}s exceeds {self.deadline:.0f}s")
+            waiter = _Waiter(user)
+            self._queues[priority].setdefault(user, deque()).append(waiter)
+
+        start = time.perf_counter()
+        waiter.event.wait(self.deadline)
+        with self._lock:
+            if not waiter.granted:
+                user_queue = self._queues[priority].get(user)
+                if user_queue is not None:
+                    user_queue.remove(waiter)
+                    if not user_queue:
+                        del self._queues[priority][user]
+                self._shed(priority, f"queued longer than {self.deadline:.0f}s")
+            self._metrics[priority].record_wait(time.perf_counter() - start)
+
+    def _dispatch(self):
+        """Hand free slots to waiters: highest class first, round-robin across users. Lock held."""
+        for priority in PRIORITY_CLASSES:
+            users = self._queues[priority]
+            while users and self._in_flight < self.max_in_flight:
+                user, waiters = next(iter(users.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    users.move_to_end(user)
+                else:
+                    del users[user]
+                self._in_flight += 1
+                waiter.granted = True
+                waiter.event.set()
+
+    def _release(self, service_seconds: float):
+        with self._lock:
+            self._in_flight -= 1
+            self._service_ewma = service_seconds if self._service_ewma is None \
+                else 0.8 * self._service_ewma + 0.2 * service_seconds
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority: str, user: Optional[str] = None):
+        if priority not in self._metrics:
+            priority = "final"
+        self._acquire(priority, user or llm_user.get())
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "provider": self.provider,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "deadline_seconds": self.deadline,
+                "service_ewma_ms": round(self._service_ewma * 1000, 1) if self._service_ewma is not None else None,
+                "classes": {c: self._metrics[c].snapshot(self._queued(c)) for c in PRIORITY_CLASSES},
+            }
+
+
+def _parse_limits(spec: str) -> Dict[str, int]:
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            provider, limit = item.split("=", 1)
+            limits[provider.strip().lower()] = int(limit)
+    return limits
+
+
+_schedulers: Dict[str, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_llm_scheduler(provider: Optional[str] = None) -> LLMScheduler:
+    """Process-wide scheduler for a provider (defaults to settings.LLM_PROVIDER)"""
+    provider = (provider or settings.LLM_PROVIDER).lower()
+    with _schedulers_lock:
+        if provider not in _schedulers:
+            limits = _parse_limits(settings.LLM_MAX_IN_FLIGHT)
+            _schedulers[provider] = LLMScheduler(
+                provider, limits.get(provider, 8), settings.LLM_QUEUE_DEADLINE_SECONDS
+            )
+        return _schedulers[provider]
+
+
+def llm_scheduler_stats() -> Dict[str, Any]:
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return {s.provider: s.stats() for s in schedulers}
@@ -0,0 +1,109 @@
+"""
+In-Process History Cache (L1)
+Size-bounded LRU of each user's newest history window, in front of Redis/PostgreSQL.
+Entries expire after a short TTL, which bounds staleness when another replica changes
+a user's history and its invalidation message is missed.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+
+class LocalHistoryCache:
+    """
+    user_id -> newest `window` messages (chronological), kept for `ttl` seconds
+
+    Readers call begin_read() before loading from Redis/PostgreSQL and pass the result to
+    put(); a put is discarded if the user's history changed in between, so a slow read can
+    never overwrite a newer append or invalidation.
+    """
+
+    def __init__(self, max_users: int, ttl: float, window: int):
+        self.max_users = max(1, max_users)
+        self.ttl = ttl
+        self.window = window
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # user -> (expires_at, history)
+        self._changed: "OrderedDict[str, float]" = OrderedDict()  # user -> last change (monotonic)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def begin_read() -> float:
+        return time.monotonic()
+
+    def get(self, user_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Newest `limit` messages (all if 0), or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] <= now:
+                del self._entries[user_id]
+                entry = None
+            # Like the Redis tier, only the newest `window` messages are held
+            if entry is None or (self.window > 0 and (not limit or limit > self.window)):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            history = entry[1][-limit:] if limit else entry[1]
+        # Callers get their own dicts, as with a Redis/PostgreSQL read
+        return [dict(h) for h in history]
+
+    def put(self, user_id: str, history: List[Dict[str, Any]], read_started: float):
+        with self._lock:
+            if self._changed.get(user_id, 0.0) >= read_started:
+                return
+            window = history[-self.window:] if self.window > 0 else history
+            self._entries[user_id] = (time.monotonic() + self.ttl, [dict(h) for h in window])
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def _mark_changed(self, user_id: str):
+        """Lock held"""
+        now = time.monotonic()
+        self._changed[user_id] = now
+        self._changed.move_to_end(user_id)
+        # Reads older than the TTL are long finished; forget their change markers
+        while self._changed and next(iter(self._changed.values())) < now - self.ttl:
+            self._changed.popitem(last=False)
+
+    def append(self, user_id: str, message: Dict[str, Any]):
+        """Extend a cached window with a message written on this replica"""
+        with self._lock:
+            self._mark_changed(user_id)
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                history = entry[1] + [dict(message)]
+                if self.window > 0:
+                    history = history[-self.window:]
+                self._entries[user_id] = (entry[0], history)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._mark_changed(user_id)
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for user_id in self._entries:
+                self._mark_changed(user_id)
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._entries),
+                "max_users": self.max_users,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,148 @@
+"""
+MCP Tool Interface
+Common entry point for the rag/db/plan tools, over HTTP (default) or embedded in-process
+
+MCP_TRANSPORT=http      -> POST to MCP_SERVICE_URL (distributed deployments)
+MCP_TRANSPORT=embedded  -> import the mcp_service package and call its tools directly
+                           (single-node deployments; no HTTP/JSON/Pydantic hop)
+
+The transport is built on first use, so a broken embedded setup cannot stop the backend
+from starting.
+"""
+import contextvars
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+import httpx
+from config.settings import settings
+from services.llm_scheduler import get_llm_scheduler
+from utils.logger import logger
+
+
+class HTTPMCPTools:
+    """Calls the MCP service endpoints; returns the JSON response bodies"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def _post(self, path: str, body: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        with httpx.Client(timeout=timeout) as client:
+            response = client.post(f"{self.base_url}{path}", json=body)
+            response.raise_for_status()
+            return response.json()
+
+    def rag(self, query: str, limit: int = 5) -> Dict[str, Any]:
+        return self._post("/rag", {"query": query, "limit": limit}, timeout=30)
+
+    def db(self, query: str) -> Dict[str, Any]:
+        return self._post("/db", {"query": query}, timeout=30)
+
+    def plan(self, plan: str, query: Optional[str] = None) -> Dict[str, Any]:
+        # Web searches can take time - 60s timeout
+        return self._post("/plan", {"plan": plan, "query": query}, timeout=60.0)
+
+    def batch(self, invocations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Bounded by the slowest tool (web searches)
+        return self._post("/batch", {"invocations": invocations}, timeout=60.0).get("results", [])
+
+
+class EmbeddedMCPTools:
+    """Calls the mcp_service tool functions in-process; returns the same shapes as the HTTP endpoints"""
+
+    def __init__(self, service_path: str):
+        # Imported by package name (mcp_service.*), never by putting the package directory
+        # itself on sys.path, where its top-level modules would shadow the backend's (utils)
+        root = os.path.dirname(os.path.abspath(service_path))
+        if root not in sys.path:
+            sys.path.append(root)
+        from mcp_service.tools.rag_tool import search_documents
+        from mcp_service.tools.db_tool import query_database, POSTGRES_DSN
+        from mcp_service.tools.sql_cache import sql_result_cache, start_invalidation_listener
+        from mcp_service.tools.llm_gate import set_llm_slot_factory
+        from mcp_service.planner.mcp_planner import run_mcp_plan
+
+        self._search_documents = search_documents
+        self._query_database = query_database
+        self._run_mcp_plan = run_mcp_plan
+        self._handlers = {"rag": self.rag, "db": self.db, "plan": self.plan}
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mcp-embedded")
+        # The tools' NL->SQL and relevance calls go to Ollama; admit them like the backend's own
+        ollama_scheduler = get_llm_scheduler("ollama")
+        set_llm_slot_factory(lambda priority: ollama_scheduler.slot(priority))
+        # Same startup hook the MCP service runs (opt-in via SQL_CACHE_LISTEN)
+        start_invalidation_listener(POSTGRES_DSN, sql_result_cache)
+        logger.info(f"[MCPTools] Embedded MCP tools loaded from {os.path.dirname(sys.modules['mcp_service'].__file__)}")
+
+    def rag(self, query: str, limit: int = 5) -> Dict[str, Any]:
+        return self._search_documents(query, limit)
+
+    def db(self, query: str) -> Dict[str, Any]:
+        return self._query_database(query)
+
+    def plan(self, plan: str, query: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            data = self._run_mcp_plan(plan, query)
+            return {"results": data.get("results", []), "error": None}
+        except Exception as e:
+            return {"results": [], "error": str(e)}
+
+    def _invoke(self, index: int, invocation: Dict[str, Any]) -> Dict[str, Any]:
+        invocation_id = invocation.get("id") or str(index)
+        start = time.perf_counter()
+        try:
+            result = self._handlers[invocation["tool"]](**invocation.get("args", {}))
+            error = result.get("error")
+            success = result.get("success", error is None)
+        except Exception as e:
+            logger.error(f"[MCPTools] {invocation.get('tool')} invocation {invocation_id} failed: {e}")
+            result, error, success = None, str(e), False
+        return {
+            "id": invocation_id,
+            "tool": invocation.get("tool"),
+            "success": bool(success),
+            "result": result,
+            "error": error,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def batch(self, invocations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Copy the request context so LLM calls are scheduled for the requesting user
+        futures = [
+            self._executor.submit(contextvars.copy_context().run, self._invoke, i, inv)
+            for i, inv in enumerate(invocations)
+        ]
+        return [future.result() for future in futures]
+
+
+def _build_mcp_tools():
+    transport = settings.MCP_TRANSPORT.lower()
+    if transport == "embedded":
+        try:
+            return EmbeddedMCPTools(settings.MCP_SERVICE_PATH)
+        except ImportError as e:
+            logger.error(f"[MCPTools] Embedded MCP tools unavailable ({e}), using http")
+            return HTTPMCPTools(settings.MCP_SERVICE_URL)
+    if transport != "http":
+        logger.warning(f"[MCPTools] Unknown MCP_TRANSPORT '{settings.MCP_TRANSPORT}', using http")
+    return HTTPMCPTools(settings.MCP_SERVICE_URL)
+
+
+class _LazyMCPTools:
+    """Builds the configured transport on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools = None
+
+    def __getattr__(self, name):
+        if self._tools is None:
+            with self._lock:
+                if self._tools is None:
+                    self._tools = _build_mcp_tools()
+        return getattr(self._tools, name)
+
+
+mcp_tools = _LazyMCPTools()
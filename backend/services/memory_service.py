@@ -1,14 +1,82 @@
 from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text, insert, table, column
 from config.settings import settings
+from services.database import SessionLocal, get_async_engine
+from services.local_history_cache import LocalHistoryCache
+from services.redis_history_cache import RedisHistoryCache
 from utils.logger import logger
+import re
 import json
-from datetime import datetime, timedelta
+import base64
+import asyncio
+import queue
+import itertools
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, date, timezone
 from redis import Redis
 
-engine = create_engine(settings.POSTGRES_DSN, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+SUMMARY_CACHE_SIZE = 10000
+
+# Pub/sub channel for cross-replica L1 invalidation; payload "<replica id>:<user_id>"
+L1_INVALIDATION_CHANNEL = "conversation_history:invalidate"
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+Update the summary with the new turns below. Keep facts, names, numbers, user preferences and
+open questions; drop pleasantries and repetition. Reply with the updated summary only, at most
+{max_words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}"""
+
+
+PARTITION_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def _partition_for(day: date, interval: str):
+    """(name, start, end) of the conversation_history partition covering `day`"""
+    if interval == "month":
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        name = f"conversation_history_p{start:%Y%m}"
+    else:
+        start, end = day, day + timedelta(days=1)
+        name = f"conversation_history_p{start:%Y%m%d}"
+    return name, datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    """Opaque history page cursor: keyset position (created_at, id) of the oldest message returned"""
+    raw = json.dumps({"t": created_at, "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(created_at, id); raises ValueError on a malformed cursor"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(data["t"]), int(data["i"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); avoids a tokenizer dependency"""
+    return len(text) // 4 + 1
+
+
+conversation_table = table(
+    "conversation_history",
+    column("user_id"), column("role"), column("content"), column("created_at"), column("metadata"),
+)
 
 class MemoryService:
     """
@@ -16,16 +84,63 @@ class MemoryService:
     
     Features:
     - Persistent storage (survives service restarts)
-    - Automatic cleanup of old conversations (30 days)
+    - Automatic cleanup of old conversations (30 days, see services/retention_worker.py)
     - Per-user conversation isolation
+    - Write-behind: messages are buffered and flushed as multi-row INSERTs by a
+      background thread; reads merge unflushed messages (read-your-writes)
+    - Rolling summary: turns that no longer fit the context token budget are folded
+      into a stored per-user summary by a background worker (see get_context)
+    - Range-partitioned by created_at (daily or monthly); future partitions are created
+      ahead of time and retention drops whole partitions instead of deleting rows
+    - In-process L1 cache of recent histories in front of Redis, invalidated across
+      replicas through Redis pub/sub
     """
     
     def __init__(self):
         self.redis = self._init_redis()
         self.redis_ttl = settings.REDIS_HISTORY_TTL_SECONDS
         self.redis_max_items = settings.REDIS_HISTORY_MAX_ITEMS
+        self.redis_cache = (
+            RedisHistoryCache(self.redis, self.redis_ttl, self.redis_max_items) if self.redis else None
+        )
+        self._partitioned = False
         self._ensure_table_exists()
 
+        # L1: same window as the Redis tier, short TTL
+        self.l1: Optional[LocalHistoryCache] = None
+        self._replica_id = uuid.uuid4().hex[:12]
+        self._invalidation_channel = ""
+        self._remote_invalidations = 0
+        if settings.HISTORY_L1_ENABLED:
+            self.l1 = LocalHistoryCache(
+                settings.HISTORY_L1_MAX_USERS, settings.HISTORY_L1_TTL_SECONDS, self.redis_max_items
+            )
+
+        # Write-behind buffer: seq -> row, kept until its INSERT has committed
+        self.write_behind = settings.HISTORY_WRITE_BEHIND
+        self._pending: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # serializes flushes with clear_history
+        self._seq = itertools.count()
+        self._flush_wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if self.write_behind:
+            self._flusher = threading.Thread(target=self._flush_loop, name="history-flusher", daemon=True)
+            self._flusher.start()
+
+        # Rolling summaries: user -> (summary, summarized_until ISO timestamp)
+        self._summaries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._summary_lock = threading.Lock()
+        self._summary_queue: "queue.Queue[str]" = queue.Queue()
+        self._summary_scheduled = set()
+        self._summary_llm = None
+        if settings.HISTORY_SUMMARIZATION:
+            threading.Thread(target=self._summary_loop, name="history-summarizer", daemon=True).start()
+        if self.l1 and self.redis and settings.HISTORY_L1_PUBSUB:
+            self._invalidation_channel = L1_INVALIDATION_CHANNEL
+            threading.Thread(target=self._invalidation_loop, name="history-l1-invalidation", daemon=True).start()
+
     def _init_redis(self) -> Optional[Redis]:
         if not settings.REDIS_URL:
             return None
@@ -39,108 +154,314 @@ class MemoryService:
             return None
 
     def _redis_key(self, user_id: str) -> str:
-        return f"conversation_history:{user_id}"
+        return RedisHistoryCache.key(user_id)
 
-    def _cache_append(self, user_id: str, role: str, content: str):
-        if not self.redis:
-            return
-        try:
-            key = self._redis_key(user_id)
-            payload = {
-                "role": role,
-                "content": content,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            self.redis.rpush(key, json.dumps(payload))
-            if self.redis_max_items > 0:
-                self.redis.ltrim(key, -self.redis_max_items, -1)
-            if self.redis_ttl > 0:
-                self.redis.expire(key, self.redis_ttl)
-        except Exception as e:
-            logger.warning(f"[MemoryService] Redis cache append failed: {e}")
+    def _cache_append(self, user_id: str, role: str, content: str, created_at: datetime):
+        if self.redis_cache:
+            self.redis_cache.append(user_id, role, content, created_at,
+                                    self._invalidation_channel, f"{self._replica_id}:{user_id}")
 
     def _cache_set(self, user_id: str, history: List[Dict[str, Any]]):
-        if not self.redis:
-            return
-        try:
-            key = self._redis_key(user_id)
-            self.redis.delete(key)
-            if not history:
-                return
-            for item in history:
-                self.redis.rpush(key, json.dumps(item))
-            if self.redis_ttl > 0:
-                self.redis.expire(key, self.redis_ttl)
-        except Exception as e:
-            logger.warning(f"[MemoryService] Redis cache set failed: {e}")
+        if self.redis_cache:
+            self.redis_cache.set(user_id, history)
+
+    def _cache_tail(self, user_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Newest `limit` cached messages (all if limit is 0), or None on a miss"""
+        return self.redis_cache.tail(user_id, limit) if self.redis_cache else None
+
+    def _publish_invalidations(self, pipe, user_ids):
+        """Queue L1 invalidation messages for other replicas on a Redis pipeline"""
+        if self._invalidation_channel:
+            for user_id in user_ids:
+                pipe.publish(self._invalidation_channel, f"{self._replica_id}:{user_id}")
+
+    def _invalidation_loop(self):
+        """Drop L1 entries that other replicas changed"""
+        while not self._stopping.is_set():
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self._invalidation_channel)
+                # Messages published while (re)subscribing are lost; start from an empty L1
+                self.l1.clear()
+                while not self._stopping.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message:
+                        continue
+                    replica_id, _, user_id = message["data"].partition(":")
+                    if replica_id != self._replica_id:
+                        self.l1.invalidate(user_id)
+                        self._remote_invalidations += 1
+            except Exception as e:
+                logger.warning(f"[MemoryService] L1 invalidation subscriber failed, resubscribing: {e}")
+                self._stopping.wait(1.0)
+            finally:
+                pubsub.close()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """L1 history cache metrics (hit ratio, size, invalidations)"""
+        if not self.l1:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            **self.l1.stats(),
+            "cross_replica_invalidation": bool(self._invalidation_channel),
+            "remote_invalidations": self._remote_invalidations,
+        }
 
     def _ensure_table_exists(self):
-        """Create conversation_history table if it doesn't exist"""
+        """Create the range-partitioned conversation_history table if it doesn't exist"""
         create_table_sql = """
         CREATE TABLE IF NOT EXISTS conversation_history (
-            id SERIAL PRIMARY KEY,
+            id BIGSERIAL,
             user_id VARCHAR(255) NOT NULL,
             role VARCHAR(50) NOT NULL,
             content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            metadata JSONB DEFAULT '{}'
-        );
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            metadata JSONB DEFAULT '{}',
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
         
         CREATE INDEX IF NOT EXISTS idx_conversation_user_created 
         ON conversation_history(user_id, created_at DESC);
+
+        CREATE TABLE IF NOT EXISTS conversation_summary (
+            user_id VARCHAR(255) PRIMARY KEY,
+            summary TEXT NOT NULL,
+            summarized_until TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
         """
         try:
             with SessionLocal() as session:
                 session.execute(text(create_table_sql))
+                relkind = session.execute(
+                    text("SELECT relkind FROM pg_class WHERE oid = to_regclass('conversation_history')")
+                ).scalar()
+                self._partitioned = relkind == "p"
+                if self._partitioned:
+                    # Catches rows outside every range partition (e.g. if maintenance fell behind)
+                    session.execute(text(
+                        "CREATE TABLE IF NOT EXISTS conversation_history_default "
+                        "PARTITION OF conversation_history DEFAULT"
+                    ))
                 session.commit()
                 logger.info("[MemoryService] Conversation history table ready")
         except Exception as e:
             logger.error(f"[MemoryService] Table creation error: {e}")
+            return
+        if self._partitioned:
+            self.ensure_partitions()
+        else:
+            logger.warning(
+                "[MemoryService] conversation_history is not partitioned; retention falls back to row DELETEs. "
+                "Migrate with backend/migrations/001_partition_conversation_history.sql"
+            )
 
-    def add_message(self, user_id: str, role: str, content: str, metadata: dict = None):
-        """Add a message to user's conversation history in PostgreSQL"""
+    def _list_partitions(self) -> List[tuple]:
+        """Range partitions of conversation_history as (name, start, end, estimated_rows)"""
+        with SessionLocal() as session:
+            rows = session.execute(text("""
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'conversation_history'::regclass
+            """)).fetchall()
+        partitions = []
+        for name, bound, reltuples in rows:
+            match = PARTITION_BOUND_PATTERN.search(bound or "")
+            if match:  # skips the DEFAULT partition
+                start, end = (datetime.fromisoformat(value) for value in match.groups())
+                partitions.append((name, start, end, max(0, int(reltuples))))
+        return partitions
+
+    def ensure_partitions(self) -> List[str]:
+        """Create partitions from today through HISTORY_PARTITIONS_AHEAD days ahead; returns created names"""
+        created = []
         try:
-            insert_sql = """
-            INSERT INTO conversation_history (user_id, role, content, metadata)
-            VALUES (:user_id, :role, :content, :metadata)
-            """
+            existing = [(start, end) for _, start, end, _ in self._list_partitions()]
+        except Exception as e:
+            logger.error(f"[MemoryService] Partition maintenance failed: {e}")
+            return created
+        today = datetime.utcnow().date()
+        day, horizon = today, today + timedelta(days=settings.HISTORY_PARTITIONS_AHEAD)
+        while day <= horizon:
+            name, start, end = _partition_for(day, settings.HISTORY_PARTITION_INTERVAL)
+            # Skip ranges already covered, e.g. after switching between daily and monthly
+            if not any(lo < end and start < hi for lo, hi in existing):
+                # One failure (rows for this range in the default partition, a lock timeout)
+                # must not leave the rest of the horizon uncovered
+                try:
+                    with SessionLocal() as session:
+                        session.execute(text(
+                            f"CREATE TABLE IF NOT EXISTS {_quote_ident(name)} PARTITION OF conversation_history "
+                            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                        ))
+                        session.commit()
+                    existing.append((start, end))
+                    created.append(name)
+                except Exception as e:
+                    logger.error(f"[MemoryService] Could not create history partition {name}: {e}")
+            day = end.date()
+        if created:
+            logger.info(f"[MemoryService] Created history partitions: {', '.join(created)}")
+        return created
+
+    @property
+    def partitioned(self) -> bool:
+        return self._partitioned
+
+    def drop_expired_partitions(self, cutoff: datetime):
+        """
+        Detach and drop partitions entirely older than cutoff (retention is rounded to the
+        partition interval). Returns (estimated rows removed, affected user_ids, partitions dropped)
+        """
+        removed, users, dropped = 0, set(), []
+        for name, _, end, rows in self._list_partitions():
+            if end > cutoff:
+                continue
             with SessionLocal() as session:
-                session.execute(text(insert_sql), {
-                    "user_id": user_id,
-                    "role": role,
-                    "content": content,
-                    "metadata": json.dumps(metadata or {})
-                })
+                # Collected before the drop so their cached history can be evicted
+                users.update(session.execute(text(f"SELECT DISTINCT user_id FROM {_quote_ident(name)}")).scalars())
+                session.execute(text(f"ALTER TABLE conversation_history DETACH PARTITION {_quote_ident(name)}"))
+                session.execute(text(f"DROP TABLE {_quote_ident(name)}"))
                 session.commit()
-            self._cache_append(user_id, role, content)
+            removed += rows
+            dropped.append(name)
+            logger.info(f"[MemoryService] Dropped history partition {name} (~{rows} rows)")
+        return removed, users, dropped
+
+    def evict_cached_history(self, user_ids) -> int:
+        """Drop cached history/summaries for users whose stored rows were removed"""
+        user_ids = list(user_ids)
+        with self._summary_lock:
+            for user_id in user_ids:
+                self._summaries.pop(user_id, None)
+        if self.l1:
+            for user_id in user_ids:
+                self.l1.invalidate(user_id)
+        if not self.redis or not user_ids:
+            return 0
+        evicted = 0
+        try:
+            for start in range(0, len(user_ids), 500):
+                chunk = user_ids[start:start + 500]
+                pipe = self.redis.pipeline(transaction=False)
+                for user_id in chunk:
+                    pipe.unlink(self._redis_key(user_id))
+                self._publish_invalidations(pipe, chunk)
+                evicted += sum(pipe.execute()[:len(chunk)])
         except Exception as e:
-            logger.error(f"[MemoryService] Error adding message: {e}")
+            logger.warning(f"[MemoryService] Redis cache eviction failed: {e}")
+        return evicted
 
-    def get_history(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get last N messages from user's conversation history"""
-        if self.redis:
+    def add_message(self, user_id: str, role: str, content: str, metadata: dict = None):
+        """
+        Add a message to user's conversation history
+        With write-behind enabled the INSERT happens in the next background flush
+        """
+        row = {
+            "user_id": user_id,
+            "role": role,
+            "content": content,
+            "created_at": datetime.utcnow(),
+            "metadata": json.dumps(metadata or {}),
+        }
+        if self.write_behind and self._pending_full():
+            # Back-pressure instead of dropping history: drain the buffer on the caller's thread
+            self.flush()
+        if self.write_behind and not self._pending_full():
+            with self._pending_lock:
+                self._pending[next(self._seq)] = row
+                if len(self._pending) >= settings.HISTORY_FLUSH_BATCH_SIZE:
+                    self._flush_wakeup.set()
+        else:
+            # Write-through, also when the buffer stays full because flushes are failing
             try:
-                key = self._redis_key(user_id)
-                cached = self.redis.lrange(key, 0, -1)
-                if cached:
-                    history = [json.loads(item) for item in cached]
-                    return history[-limit:] if limit else history
+                self._insert_rows([row])
             except Exception as e:
-                logger.warning(f"[MemoryService] Redis cache read failed: {e}")
+                logger.error(f"[MemoryService] Error adding message: {e}")
+                return
+        self._cache_append(user_id, role, content, row["created_at"])
+        if self.l1:
+            self.l1.append(user_id, {"role": role, "content": content, "timestamp": row["created_at"].isoformat()})
+
+    def _pending_full(self) -> bool:
+        with self._pending_lock:
+            return len(self._pending) >= settings.HISTORY_MAX_PENDING
+
+    def _insert_rows(self, rows: List[Dict[str, Any]]):
+        """Insert rows with a single multi-row INSERT"""
+        with SessionLocal() as session:
+            session.execute(insert(conversation_table).values(rows))
+            session.commit()
+
+    def flush(self) -> int:
+        """Write buffered messages to PostgreSQL; returns the number of rows written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._pending_lock:
+                    batch = list(itertools.islice(self._pending.items(), settings.HISTORY_FLUSH_BATCH_SIZE))
+                if not batch:
+                    return written
+                try:
+                    self._insert_rows([row for _, row in batch])
+                except Exception as e:
+                    # Rows stay buffered and are retried on the next flush
+                    logger.error(f"[MemoryService] Write-behind flush of {len(batch)} messages failed: {e}")
+                    return written
+                with self._pending_lock:
+                    for seq, _ in batch:
+                        self._pending.pop(seq, None)
+                written += len(batch)
+
+    def _flush_loop(self):
+        interval = settings.HISTORY_FLUSH_INTERVAL_MS / 1000
+        while not self._stopping.is_set():
+            self._flush_wakeup.wait(interval)
+            self._flush_wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the background flusher and drain the write-behind buffer"""
+        self._stopping.set()
+        self._flush_wakeup.set()
+        if self._flusher:
+            self._flusher.join(timeout=10)
+        written = self.flush()
+        with self._pending_lock:
+            remaining = len(self._pending)
+        logger.info(f"[MemoryService] Write-behind drained ({written} flushed, {remaining} not written)")
+
+    def _pending_for(self, user_id: str) -> List[Dict[str, Any]]:
+        with self._pending_lock:
+            rows = [row for row in self._pending.values() if row["user_id"] == user_id]
+        return [
+            {"role": row["role"], "content": row["content"], "timestamp": row["created_at"].isoformat()}
+            for row in rows
+        ]
+
+    def get_history(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get last N messages from user's conversation history"""
+        if self.l1:
+            cached = self.l1.get(user_id, limit)
+            if cached is not None:
+                return cached
+            read_started = self.l1.begin_read()
+        # With L1 on, read the whole Redis window so it can be cached locally
+        window_read = bool(self.l1) and 0 < limit <= self.redis_max_items
+        cached = self._cache_tail(user_id, self.redis_max_items if window_read else limit)
+        if cached is not None:
+            if window_read:
+                self.l1.put(user_id, cached, read_started)
+                return cached[-limit:]
+            return cached
+        # Load a full cache window even when fewer messages were requested
+        fetch_limit = max(limit, self.redis_max_items) if (self.redis or self.l1) and limit else limit
         try:
-            query_sql = """
-            SELECT role, content, created_at, metadata
-            FROM conversation_history
-            WHERE user_id = :user_id
-            ORDER BY created_at DESC
-            LIMIT :limit
-            """
+            pending = self._pending_for(user_id)
             with SessionLocal() as session:
-                result = session.execute(text(query_sql), {
-                    "user_id": user_id,
-                    "limit": limit
-                })
-                rows = result.fetchall()
+                rows = self._fetch_recent_rows(session, user_id, fetch_limit)
                 
                 # Reverse to get chronological order
                 history = []
@@ -150,47 +471,326 @@ class MemoryService:
                         "content": row[1],
                         "timestamp": row[2].isoformat() if row[2] else None
                     })
-                self._cache_set(user_id, history[-self.redis_max_items:] if self.redis_max_items > 0 else history)
-                return history
+                # Read-your-writes: add buffered messages not yet flushed when the SELECT ran
+                if pending:
+                    flushed = {(h["role"], h["content"], h["timestamp"]) for h in history}
+                    history.extend(p for p in pending if (p["role"], p["content"], p["timestamp"]) not in flushed)
+                    history.sort(key=lambda h: h["timestamp"] or "")
+                window = history[-self.redis_max_items:] if self.redis_max_items > 0 else history
+                self._cache_set(user_id, window)
+                if self.l1:
+                    self.l1.put(user_id, window, read_started)
+                return history[-limit:] if limit else history
         except Exception as e:
             logger.error(f"[MemoryService] Error getting history: {e}")
             return []
     
+    def _fetch_recent_rows(self, session, user_id: str, limit: int) -> list:
+        """
+        Newest rows first. On the partitioned table the recent window is searched first,
+        so active users only touch the newest partitions (plan-time partition pruning)
+        """
+        query_sql = """
+        SELECT role, content, created_at, metadata
+        FROM conversation_history
+        WHERE user_id = :user_id {window}
+        ORDER BY created_at DESC
+        LIMIT :limit
+        """
+        params = {"user_id": user_id, "limit": limit}
+        if not self._partitioned or not limit:
+            return session.execute(text(query_sql.format(window="")), params).fetchall()
+
+        params["boundary"] = datetime.utcnow() - timedelta(days=settings.HISTORY_RECENT_WINDOW_DAYS)
+        rows = session.execute(text(query_sql.format(window="AND created_at >= :boundary")), params).fetchall()
+        if len(rows) < limit:
+            params["limit"] = limit - len(rows)
+            rows += session.execute(text(query_sql.format(window="AND created_at < :boundary")), params).fetchall()
+        return rows
+
+    def get_history_page(self, user_id: str, limit: int = 10, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Keyset-paginated history, newest page first
+
+        Every page, the first included, is read from PostgreSQL with keyset pagination on
+        (created_at, id): each costs one index range scan no matter how deep it is, and rows
+        sharing a timestamp are neither skipped nor repeated across pages. The caches hold no
+        row ids, so they cannot position a cursor. Messages within a page are chronological.
+
+        Returns:
+            {"history": [...], "next_cursor": str or None}
+        """
+        max_limit = settings.HISTORY_PAGE_MAX_LIMIT
+        limit = min(limit, max_limit) if limit > 0 else max_limit
+        keyset, params = "", {"user_id": user_id, "limit": limit + 1}
+        if cursor is None:
+            # Read-your-writes: buffered messages need ids before they can be paged
+            if self._pending_for(user_id):
+                self.flush()
+        else:
+            params["created_at"], params["id"] = decode_cursor(cursor)
+            keyset = "AND (created_at, id) < (:created_at, :id)"
+        with SessionLocal() as session:
+            rows = session.execute(text(f"""
+                SELECT id, role, content, created_at
+                FROM conversation_history
+                WHERE user_id = :user_id {keyset}
+                ORDER BY created_at DESC, id DESC
+                LIMIT :limit
+            """), params).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        history = [
+            {"role": row.role, "content": row.content, "timestamp": row.created_at.isoformat()}
+            for row in reversed(rows)
+        ]
+        next_cursor = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].id) if has_more else None
+        return {"history": history, "next_cursor": next_cursor}
+
+    async def export_history(self, user_id: Optional[str] = None, since: Optional[datetime] = None,
+                             until: Optional[datetime] = None):
+        """
+        Stream stored messages as NDJSON (one message per line), oldest first
+
+        Rows come through a server-side cursor on the async engine in batches of
+        HISTORY_EXPORT_BATCH_SIZE, so memory use does not grow with the export size.
+        """
+        # Buffered messages are part of the export
+        await asyncio.to_thread(self.flush)
+        # created_at is a naive UTC TIMESTAMP
+        since, until = (
+            value.astimezone(timezone.utc).replace(tzinfo=None) if value and value.tzinfo else value
+            for value in (since, until)
+        )
+        conditions, params = [], {}
+        if user_id:
+            conditions.append("user_id = :user_id")
+            params["user_id"] = user_id
+        if since:
+            conditions.append("created_at >= :since")
+            params["since"] = since
+        if until:
+            conditions.append("created_at < :until")
+            params["until"] = until
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = text(f"""
+            SELECT id, user_id, role, content, created_at, metadata::text AS metadata
+            FROM conversation_history
+            {where}
+            ORDER BY created_at, id
+        """).execution_options(yield_per=settings.HISTORY_EXPORT_BATCH_SIZE)
+
+        async with get_async_engine().connect() as conn:
+            result = await conn.stream(query, params)
+            # One chunk per fetched batch keeps per-row overhead off the response path
+            async for rows in result.partitions():
+                # metadata is already JSON text; splice it in instead of decoding and re-encoding
+                yield "".join(
+                    json.dumps({
+                        "id": row.id,
+                        "user_id": row.user_id,
+                        "role": row.role,
+                        "content": row.content,
+                        "created_at": row.created_at.isoformat(),
+                    }, ensure_ascii=False)[:-1] + f',"metadata":{row.metadata or "{}"}}}\n'
+                    for row in rows
+                )
+
+    def get_context(self, user_id: str, token_budget: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Conversation context for the agents: rolling summary + the newest turns that fit the budget
+
+        Returns:
+            {"summary": str or None, "messages": [...]} where messages are the turns after the
+            summary, newest ones kept within token_budget (default HISTORY_CONTEXT_TOKEN_BUDGET).
+            When older turns overflow the budget by more than HISTORY_SUMMARY_TRIGGER_RATIO of
+            it, a background summarization is scheduled; smaller overflows wait so each LLM
+            call folds a worthwhile batch instead of one turn per request.
+        """
+        budget = token_budget or settings.HISTORY_CONTEXT_TOKEN_BUDGET
+        summary, summarized_until = self._get_summary(user_id)
+        history = self.get_history(user_id, limit=self.redis_max_items or 50)
+        if summarized_until:
+            history = [h for h in history if (h.get("timestamp") or "") > summarized_until]
+
+        older, recent = self._split_recent(history, budget)
+        overflow = sum(estimate_tokens(h["content"]) for h in older)
+        if older and settings.HISTORY_SUMMARIZATION and overflow > budget * settings.HISTORY_SUMMARY_TRIGGER_RATIO:
+            self._schedule_summary(user_id)
+        return {"summary": summary, "messages": recent}
+
+    @staticmethod
+    def _split_recent(history: List[Dict[str, Any]], budget: int):
+        """Split chronological history into (older, recent); recent is the newest turns within budget"""
+        used, start = 0, len(history)
+        while start > 0:
+            cost = estimate_tokens(history[start - 1]["content"])
+            # Always keep the newest turn, even if it alone exceeds the budget
+            if used + cost > budget and start < len(history):
+                break
+            used += cost
+            start -= 1
+        return history[:start], history[start:]
+
+    def _get_summary(self, user_id: str):
+        with self._summary_lock:
+            if user_id in self._summaries:
+                self._summaries.move_to_end(user_id)
+                return self._summaries[user_id]
+        entry = (None, None)
+        try:
+            with SessionLocal() as session:
+                row = session.execute(
+                    text("SELECT summary, summarized_until FROM conversation_summary WHERE user_id = :user_id"),
+                    {"user_id": user_id},
+                ).fetchone()
+            if row:
+                entry = (row[0], row[1].isoformat())
+        except Exception as e:
+            logger.warning(f"[MemoryService] Error loading summary: {e}")
+            return entry
+        self._remember_summary(user_id, entry)
+        return entry
+
+    def _remember_summary(self, user_id: str, entry: tuple):
+        with self._summary_lock:
+            self._summaries[user_id] = entry
+            self._summaries.move_to_end(user_id)
+            while len(self._summaries) > SUMMARY_CACHE_SIZE:
+                self._summaries.popitem(last=False)
+
+    def _schedule_summary(self, user_id: str):
+        with self._summary_lock:
+            if user_id in self._summary_scheduled:
+                return
+            self._summary_scheduled.add(user_id)
+        self._summary_queue.put(user_id)
+
+    def _summary_loop(self):
+        while True:
+            user_id = self._summary_queue.get()
+            try:
+                self.summarize(user_id)
+            except Exception as e:
+                logger.error(f"[MemoryService] Summarization failed for {user_id}: {e}")
+            finally:
+                with self._summary_lock:
+                    self._summary_scheduled.discard(user_id)
+
+    def summarize(self, user_id: str) -> bool:
+        """
+        Fold turns that overflow the context budget into the user's rolling summary
+        Runs on the background summarizer thread; returns True if the summary changed.
+        Folds at most HISTORY_SUMMARY_BATCH_TURNS of the oldest turns per LLM call and
+        commits summarized_until after each one, so a long backlog is bounded in memory and
+        prompt size and a failure keeps the batches already folded.
+        """
+        self.flush()
+        with SessionLocal() as session:
+            row = session.execute(
+                text("SELECT summary, summarized_until FROM conversation_summary WHERE user_id = :user_id"),
+                {"user_id": user_id},
+            ).fetchone()
+            summary, until = (row[0], row[1]) if row else (None, None)
+            params = {"user_id": user_id, "limit": self.redis_max_items or 50}
+            since = ""
+            if until:
+                since = "AND created_at > :until"
+                params["until"] = until
+            # Same window get_context reads; turns before its recent part overflow the budget
+            rows = session.execute(text(f"""
+                SELECT content, created_at FROM conversation_history
+                WHERE user_id = :user_id {since}
+                ORDER BY created_at DESC LIMIT :limit
+            """), params).fetchall()
+        window = [{"content": r[0], "created_at": r[1]} for r in reversed(rows)]
+        older, recent = self._split_recent(window, settings.HISTORY_CONTEXT_TOKEN_BUDGET)
+        if not older:
+            return False
+        recent_since = recent[0]["created_at"]
+
+        changed = False
+        while True:
+            params = {"user_id": user_id, "before": recent_since,
+                      "limit": max(1, settings.HISTORY_SUMMARY_BATCH_TURNS)}
+            since = ""
+            if until:
+                since = "AND created_at > :until"
+                params["until"] = until
+            with SessionLocal() as session:
+                rows = session.execute(text(f"""
+                    SELECT role, content, created_at FROM conversation_history
+                    WHERE user_id = :user_id {since} AND created_at < :before
+                    ORDER BY created_at LIMIT :limit
+                """), params).fetchall()
+            if not rows:
+                return changed
+            batch = [{"role": r[0], "content": r[1], "created_at": r[2]} for r in rows]
+            summary, until = self._fold(user_id, summary, batch)
+            changed = True
+            if len(rows) < params["limit"]:
+                return changed
+
+    def _fold(self, user_id: str, summary: Optional[str], older: List[Dict[str, Any]]):
+        """Fold one batch of turns into the summary and persist it; returns (summary, summarized_until)"""
+        if self._summary_llm is None:
+            from config.langchain_config import get_langchain_llm
+            self._summary_llm = get_langchain_llm(
+                temperature=0.2, max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS, priority="background"
+            )
+        turns = "\n".join(
+            f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content'][:2000]}" for m in older
+        )
+        prompt = SUMMARY_PROMPT.format(
+            max_words=int(settings.HISTORY_SUMMARY_MAX_TOKENS * 0.75),
+            summary=summary or "(none yet)",
+            turns=turns,
+        )
+        new_summary = self._summary_llm.invoke(prompt).content.strip()
+        new_until = older[-1]["created_at"]
+
+        with SessionLocal() as session:
+            session.execute(text("""
+                INSERT INTO conversation_summary (user_id, summary, summarized_until, updated_at)
+                VALUES (:user_id, :summary, :until, :now)
+                ON CONFLICT (user_id) DO UPDATE
+                SET summary = EXCLUDED.summary,
+                    summarized_until = EXCLUDED.summarized_until,
+                    updated_at = EXCLUDED.updated_at
+            """), {"user_id": user_id, "summary": new_summary, "until": new_until, "now": datetime.utcnow()})
+            session.commit()
+        self._remember_summary(user_id, (new_summary, new_until.isoformat()))
+        logger.info(f"[MemoryService] Folded {len(older)} turns into summary for {user_id} "
+                    f"(~{estimate_tokens(new_summary)} tokens)")
+        return new_summary, new_until
+
     def clear_history(self, user_id: str):
         """Clear all conversation history for a user"""
         try:
             delete_sql = "DELETE FROM conversation_history WHERE user_id = :user_id"
-            with SessionLocal() as session:
-                session.execute(text(delete_sql), {"user_id": user_id})
-                session.commit()
-                logger.info(f"[MemoryService] Cleared history for user {user_id}")
+            # Hold the flush lock so buffered messages cannot be written after the DELETE
+            with self._flush_lock:
+                with self._pending_lock:
+                    for seq in [seq for seq, row in self._pending.items() if row["user_id"] == user_id]:
+                        del self._pending[seq]
+                with SessionLocal() as session:
+                    session.execute(text(delete_sql), {"user_id": user_id})
+                    session.execute(text("DELETE FROM conversation_summary WHERE user_id = :user_id"), {"user_id": user_id})
+                    session.commit()
+                    logger.info(f"[MemoryService] Cleared history for user {user_id}")
+            with self._summary_lock:
+                self._summaries.pop(user_id, None)
+            if self.l1:
+                self.l1.invalidate(user_id)
             if self.redis:
                 try:
-                    self.redis.delete(self._redis_key(user_id))
+                    pipe = self.redis.pipeline(transaction=False)
+                    pipe.delete(self._redis_key(user_id))
+                    self._publish_invalidations(pipe, [user_id])
+                    pipe.execute()
                 except Exception as e:
                     logger.warning(f"[MemoryService] Redis cache delete failed: {e}")
         except Exception as e:
             logger.error(f"[MemoryService] Error clearing history: {e}")
     
-    def cleanup_old_conversations(self, days: int = 30):
-        """
-        Delete conversations older than specified days
-        Call this periodically (e.g., daily cron job)
-        """
-        try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            delete_sql = """
-            DELETE FROM conversation_history 
-            WHERE created_at < :cutoff_date
-            """
-            with SessionLocal() as session:
-                result = session.execute(text(delete_sql), {"cutoff_date": cutoff_date})
-                deleted_count = result.rowcount
-                session.commit()
-                logger.info(f"[MemoryService] Cleaned up {deleted_count} old messages (>{days} days)")
-                return deleted_count
-        except Exception as e:
-            logger.error(f"[MemoryService] Error during cleanup: {e}")
-            return 0
-
 memory_service = MemoryService()
@@ -1,9 +1,5 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from config.settings import settings
-
-engine = create_engine(settings.POSTGRES_DSN, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+from sqlalchemy import text
+from services.database import SessionLocal
 
 class PostgresService:
     def run_query(self, sql: str, params=None):
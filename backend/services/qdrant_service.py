@@ -1,6 +1,10 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, PayloadSchemaType,
+    Filter, FieldCondition, MatchValue, HasIdCondition, FilterSelector,
+    SetPayload, SetPayloadOperation,
+)
 from config.settings import settings
 
 class QdrantService:
@@ -21,6 +25,10 @@ class QdrantService:
                 collection_name=self.collection_name,
                 vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
             )
+        # Incremental ingestion deletes a file's points by path
+        self.client.create_payload_index(
+            collection_name=self.collection_name, field_name="path", field_schema=PayloadSchemaType.KEYWORD
+        )
 
     def upsert_documents(self, docs: List[Dict[str, Any]]):
         points = [
@@ -29,6 +37,31 @@ class QdrantService:
         ]
         self.client.upsert(collection_name=self.collection_name, points=points)
 
+    def count(self) -> int:
+        return self.client.count(collection_name=self.collection_name, exact=True).count
+
+    def set_payloads(self, payloads: Dict[str, Dict[str, Any]]):
+        """Per-point payload updates ({id: fields}) in one request"""
+        if payloads:
+            self.client.batch_update_points(
+                collection_name=self.collection_name,
+                update_operations=[
+                    SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[point_id]))
+                    for point_id, payload in payloads.items()
+                ],
+            )
+
+    def delete_by_path(self, path: str, keep_ids: Optional[List[str]] = None):
+        """Delete a source file's points, except keep_ids (its current chunks)"""
+        must_not = [HasIdCondition(has_id=keep_ids)] if keep_ids else None
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=Filter(
+                must=[FieldCondition(key="path", match=MatchValue(value=path))],
+                must_not=must_not,
+            )),
+        )
+
     def search(self, query_vector: List[float], limit: int = 5) -> List[Dict[str, Any]]:
         from qdrant_client.models import PointStruct, SearchRequest
 
@@ -0,0 +1,100 @@
+"""
+Redis History Cache (L2)
+Each user's newest history window as a Redis list, shared by all backend replicas.
+Entries use a compact JSON encoding; appends only extend an already cached list, so a
+partial list is never mistaken for a complete history.
+"""
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from redis import Redis
+from utils.logger import logger
+
+# Atomic bounded append: only extends an existing cached list (a partial list would
+# look like a complete history), then trims to the newest N items and refreshes the TTL.
+# Also publishes the L1 invalidation for other replicas (ARGV[4] channel, ARGV[5] payload)
+CACHE_APPEND_SCRIPT = """
+if ARGV[4] ~= '' then
+    redis.call('PUBLISH', ARGV[4], ARGV[5])
+end
+if redis.call('RPUSHX', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+local max_items = tonumber(ARGV[2])
+if max_items > 0 then
+    redis.call('LTRIM', KEYS[1], -max_items, -1)
+end
+local ttl = tonumber(ARGV[3])
+if ttl > 0 then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return 1
+"""
+
+
+class RedisHistoryCache:
+    """
+    user_id -> newest `max_items` messages (chronological) in Redis, expiring after `ttl` seconds
+
+    Every operation is a single round trip (Lua script, MULTI pipeline or LRANGE of the tail).
+    Redis errors are logged and treated as a miss; PostgreSQL stays the source of truth.
+    """
+
+    def __init__(self, redis: Redis, ttl: int, max_items: int):
+        self.redis = redis
+        self.ttl = ttl
+        self.max_items = max_items
+        self._append_script = redis.register_script(CACHE_APPEND_SCRIPT)
+
+    @staticmethod
+    def key(user_id: str) -> str:
+        # v2: compact entry encoding (see encode_entry)
+        return f"conversation_history:v2:{user_id}"
+
+    @staticmethod
+    def encode_entry(role: str, content: str, timestamp: Optional[str]) -> str:
+        return json.dumps({"r": role, "c": content, "t": timestamp}, separators=(",", ":"), ensure_ascii=False)
+
+    @staticmethod
+    def decode_entry(raw: str) -> Dict[str, Any]:
+        item = json.loads(raw)
+        return {"role": item["r"], "content": item["c"], "timestamp": item.get("t")}
+
+    def append(self, user_id: str, role: str, content: str, created_at: datetime,
+               channel: str = "", message: str = ""):
+        """Append to a cached history (no-op on a miss), publishing message on channel if set"""
+        try:
+            self._append_script(
+                keys=[self.key(user_id)],
+                args=[self.encode_entry(role, content, created_at.isoformat()), self.max_items, self.ttl,
+                      channel, message],
+            )
+        except Exception as e:
+            logger.warning(f"[MemoryService] Redis cache append failed: {e}")
+
+    def set(self, user_id: str, history: List[Dict[str, Any]]):
+        """Replace a user's cached history"""
+        try:
+            key = self.key(user_id)
+            # One round trip: MULTI / DEL / RPUSH all items / EXPIRE / EXEC
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.delete(key)
+            if history:
+                pipe.rpush(key, *(self.encode_entry(h["role"], h["content"], h.get("timestamp")) for h in history))
+                if self.ttl > 0:
+                    pipe.expire(key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[MemoryService] Redis cache set failed: {e}")
+
+    def tail(self, user_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Newest `limit` cached messages (all if limit is 0), or None on a miss"""
+        # The cache only holds the newest max_items; larger windows must come from PostgreSQL
+        if self.max_items > 0 and (not limit or limit > self.max_items):
+            return None
+        try:
+            cached = self.redis.lrange(self.key(user_id), -limit if limit else 0, -1)
+            return [self.decode_entry(item) for item in cached] if cached else None
+        except Exception as e:
+            logger.warning(f"[MemoryService] Redis cache read failed: {e}")
+            return None
@@ -0,0 +1,185 @@
+"""
+Conversation History Retention
+Background worker that enforces HISTORY_RETENTION_DAYS without a cron job:
+- creates upcoming partitions and drops expired ones (partitioned table)
+- deletes leftover expired rows in bounded primary-key ranges, pausing between
+  batches so deletes never hold long locks or saturate I/O
+- one replica at a time: a pass only runs while holding a Postgres advisory lock
+- evicts the Redis history of every user whose rows were removed
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Set
+from sqlalchemy import text
+from config.settings import settings
+from services.database import engine, SessionLocal
+from services.memory_service import memory_service
+from utils.logger import logger
+
+# pg_try_advisory_lock key shared by every backend replica
+RETENTION_LOCK_KEY = 0x68697374  # "hist"
+
+
+class RetentionWorker:
+    """
+    Periodic retention pass for conversation_history / conversation_summary
+
+    Usage:
+        retention_worker.start()          # app startup (HISTORY_RETENTION_ENABLED)
+        retention_worker.trigger(days)    # admin endpoint, runs one pass in the background
+        retention_worker.status()         # progress of the current/last pass
+    """
+
+    def __init__(self):
+        self._run_lock = threading.Lock()  # one pass per process
+        self._status_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._status: Dict[str, Any] = {"running": False, "last_run": None}
+        self._started = 0.0
+
+    def _update(self, **fields):
+        with self._status_lock:
+            self._status.update(fields)
+
+    def status(self) -> Dict[str, Any]:
+        with self._status_lock:
+            status = dict(self._status)
+            if status["running"]:
+                status["elapsed_seconds"] = round(time.monotonic() - self._started, 1)
+        return status
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="history-retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the periodic loop; an in-progress pass stops after its current batch"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _loop(self):
+        while not self._stopping.wait(settings.HISTORY_RETENTION_INTERVAL_SECONDS):
+            self.run_once(settings.HISTORY_RETENTION_DAYS)
+
+    def trigger(self, days: int) -> bool:
+        """Start a pass in the background; False if one is already running in this process"""
+        if self._run_lock.locked():
+            return False
+        threading.Thread(target=self.run_once, args=(days,), name="history-retention-once", daemon=True).start()
+        return True
+
+    def run_once(self, days: int) -> Dict[str, Any]:
+        """Run one retention pass if no other pass (in this process or another replica) is running"""
+        if not self._run_lock.acquire(blocking=False):
+            return self.status()
+        try:
+            with engine.connect() as lock_conn:
+                # Session-level lock: held across the per-batch transactions below
+                locked = lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": RETENTION_LOCK_KEY}).scalar()
+                lock_conn.commit()
+                if not locked:
+                    logger.info("[RetentionWorker] Another replica holds the retention lock, skipping")
+                    self._update(skipped_lock_at=datetime.utcnow().isoformat())
+                    return self.status()
+                try:
+                    self._run(days)
+                finally:
+                    lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RETENTION_LOCK_KEY})
+                    lock_conn.commit()
+        except Exception as e:
+            logger.error(f"[RetentionWorker] Retention pass failed: {e}")
+            self._update(running=False, phase="failed", last_error=str(e))
+        finally:
+            self._run_lock.release()
+        return self.status()
+
+    def _run(self, days: int):
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        started = self._started = time.monotonic()
+        self._update(
+            running=True, phase="partitions", days=days, cutoff=cutoff.isoformat(),
+            started_at=datetime.utcnow().isoformat(), finished_at=None,
+            partitions_created=0, partitions_dropped=0, rows_deleted=0, batches=0,
+            rows_per_sec=0.0, users_evicted=0, last_error=None,
+        )
+        users: Set[str] = set()
+        partition_rows = 0
+
+        if memory_service.partitioned:
+            created = memory_service.ensure_partitions()
+            partition_rows, dropped_users, dropped = memory_service.drop_expired_partitions(cutoff)
+            users |= dropped_users
+            self._update(partitions_created=len(created), partitions_dropped=len(dropped))
+            # Rows outside every range partition (e.g. before the migration) end up here
+            target = "conversation_history_default"
+        else:
+            target = "conversation_history"
+
+        self._update(phase="rows")
+        deleted = self._delete_in_batches(target, cutoff, users, started)
+
+        self._update(phase="summaries")
+        with SessionLocal() as session:
+            users.update(session.execute(
+                text("DELETE FROM conversation_summary WHERE updated_at < :cutoff RETURNING user_id"),
+                {"cutoff": cutoff},
+            ).scalars())
+            session.commit()
+
+        self._update(phase="cache")
+        memory_service.evict_cached_history(users)
+
+        elapsed = time.monotonic() - started
+        self._update(
+            running=False, phase="done", finished_at=datetime.utcnow().isoformat(),
+            last_run=datetime.utcnow().isoformat(), elapsed_seconds=round(elapsed, 1),
+            users_evicted=len(users),
+        )
+        logger.info(
+            f"[RetentionWorker] Retention (>{days} days) done in {elapsed:.1f}s: "
+            f"~{partition_rows} rows in dropped partitions, {deleted} rows deleted, {len(users)} users evicted"
+        )
+
+    def _delete_in_batches(self, target: str, cutoff: datetime, users: Set[str], started: float) -> int:
+        """
+        DELETE expired rows in id ranges of HISTORY_RETENTION_BATCH_SIZE, one short transaction each
+        ids grow with created_at, so the pass stops at the first row past the range that is not expired
+        """
+        batch_size = max(1, settings.HISTORY_RETENTION_BATCH_SIZE)
+        pause = settings.HISTORY_RETENTION_BATCH_PAUSE_MS / 1000
+        with SessionLocal() as session:
+            lo = session.execute(
+                text(f"SELECT min(id) FROM {target} WHERE created_at < :cutoff"), {"cutoff": cutoff}
+            ).scalar()
+        deleted, batches = 0, 0
+        while lo is not None and not self._stopping.is_set():
+            hi = lo + batch_size
+            with SessionLocal() as session:
+                removed = session.execute(
+                    text(f"DELETE FROM {target} WHERE id >= :lo AND id < :hi AND created_at < :cutoff RETURNING user_id"),
+                    {"lo": lo, "hi": hi, "cutoff": cutoff},
+                ).scalars().all()
+                session.commit()
+                following = session.execute(
+                    text(f"SELECT id, created_at FROM {target} WHERE id >= :hi ORDER BY id LIMIT 1"), {"hi": hi}
+                ).first()
+            users.update(removed)
+            deleted += len(removed)
+            batches += 1
+            elapsed = time.monotonic() - started
+            self._update(rows_deleted=deleted, batches=batches, last_id=hi - 1,
+                         rows_per_sec=round(deleted / elapsed, 1) if elapsed > 0 else 0.0)
+            if batches % 20 == 0:
+                logger.info(f"[RetentionWorker] {deleted} rows deleted from {target} ({batches} batches)")
+
+            lo = following.id if following is not None and following.created_at < cutoff else None
+            if lo is not None:
+                self._stopping.wait(pause)
+        return deleted
+
+
+retention_worker = RetentionWorker()
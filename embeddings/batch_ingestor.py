@@ -0,0 +1,204 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+UPSERT_CONCURRENCY = int(os.getenv("INGEST_UPSERT_CONCURRENCY", "2"))
+MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+
+class BatchIngestor:
+    """
+    Pipelined embed + upsert with bounded memory
+
+    Chunks are grouped into batches of batch_size. Up to embed_concurrency embedding requests
+    run at once (retried with exponential backoff), and each embedded batch is upserted on a
+    separate pool while the next ones embed. At most 2 * embed_concurrency batches exist at a
+    time; add_file() blocks when that many are in flight, so memory does not grow with the corpus.
+
+    Usage:
+        with BatchIngestor(embed_texts, upsert_documents) as ingestor:
+            ingestor.add_file(path, docs, on_complete=...)   # on_complete once all docs are stored
+
+    A batch that fails (after retries, or on any unexpected error) counts its chunks as failed,
+    and on_complete is then never called for their files.
+    """
+
+    def __init__(self, embed: Callable[[List[str]], List[List[float]]], upsert: Callable[[List[Dict]], None],
+                 batch_size: int = EMBED_BATCH_SIZE, embed_concurrency: int = EMBED_CONCURRENCY,
+                 upsert_concurrency: int = UPSERT_CONCURRENCY, max_retries: int = MAX_RETRIES,
+                 progress_interval: float = 5.0):
+        self.embed = embed
+        self.upsert = upsert
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.progress_interval = progress_interval
+        self._embed_pool = ThreadPoolExecutor(max_workers=max(1, embed_concurrency), thread_name_prefix="ingest-embed")
+        self._upsert_pool = ThreadPoolExecutor(max_workers=max(1, upsert_concurrency), thread_name_prefix="ingest-upsert")
+        self._slots = threading.BoundedSemaphore(2 * max(1, embed_concurrency))
+        self._lock = threading.Lock()
+        self._batch: List[tuple] = []  # (doc, file key)
+        self._remaining: Dict[str, int] = {}
+        self._callbacks: Dict[str, Callable[[], None]] = {}
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._started = time.perf_counter()
+        self._last_progress = self._started
+        self._embed_latencies = deque(maxlen=200)
+        self.chunks_done = 0
+        self.chunks_failed = 0
+        self.embed_calls = 0
+        self.retries = 0
+
+    def add_file(self, key: str, docs: List[Dict], on_complete: Optional[Callable[[], None]] = None):
+        """Queue a file's chunks; on_complete runs once every one of them is upserted"""
+        if not docs:
+            if on_complete:
+                on_complete()
+            return
+        with self._lock:
+            self._remaining[key] = self._remaining.get(key, 0) + len(docs)
+            if on_complete:
+                self._callbacks[key] = on_complete
+        for doc in docs:
+            self._batch.append((doc, key))
+            if len(self._batch) >= self.batch_size:
+                self._dispatch()
+
+    def _dispatch(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        self._slots.acquire()  # backpressure: wait for an in-flight batch to finish
+        with self._lock:
+            self._in_flight += 1
+        self._embed_pool.submit(self._embed_batch, batch)
+
+    def _embed_batch(self, batch: List[tuple]):
+        # Every exit that does not hand the batch to the upsert pool finishes it as failed,
+        # so _in_flight and the slot are always released and close() cannot hang
+        handed_off = False
+        try:
+            vectors = self._embed_with_retries([doc["text"] for doc, _ in batch])
+            if vectors is None:
+                return
+            if not isinstance(vectors, list) or len(vectors) != len(batch):
+                count = len(vectors) if isinstance(vectors, list) else type(vectors).__name__
+                print(f"Embedding batch returned {count} vectors for {len(batch)} texts")
+                return
+            self._upsert_pool.submit(self._upsert_batch, batch, vectors)
+            handed_off = True
+        except Exception as e:
+            print(f"Embedding batch of {len(batch)} failed: {e!r}")
+        finally:
+            if not handed_off:
+                self._finish(batch, ok=False)
+
+    def _embed_with_retries(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """Vectors for texts, or None once max_retries retries have failed"""
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                vectors = self.embed(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Embedding batch of {len(texts)} failed after {attempt + 1} attempts: {e}")
+                    return None
+                delay = min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random())
+                with self._lock:
+                    self.retries += 1
+                print(f"Embedding batch failed ({e}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            with self._lock:
+                self.embed_calls += 1
+                self._embed_latencies.append(time.perf_counter() - start)
+            return vectors
+        return None
+
+    def _upsert_batch(self, batch: List[tuple], vectors: List[List[float]]):
+        ok = False
+        try:
+            points = [
+                {"id": doc["id"], "vector": vector, "payload": {"text": doc["text"], **doc["meta"]}}
+                for (doc, _), vector in zip(batch, vectors)
+            ]
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.upsert(points)
+                    ok = True
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        print(f"Upsert of {len(points)} points failed after {attempt + 1} attempts: {e}")
+                        break
+                    with self._lock:
+                        self.retries += 1
+                    time.sleep(min(30.0, 0.5 * 2 ** attempt))
+        except Exception as e:
+            print(f"Upsert batch of {len(batch)} failed: {e!r}")
+        finally:
+            self._finish(batch, ok=ok)
+
+    def _finish(self, batch: List[tuple], ok: bool):
+        completed = []
+        with self._lock:
+            for _, key in batch:
+                if ok:
+                    self.chunks_done += 1
+                else:
+                    self.chunks_failed += 1
+                    # A file with a failed chunk is never reported complete
+                    self._callbacks.pop(key, None)
+                self._remaining[key] -= 1
+                if self._remaining[key] == 0:
+                    del self._remaining[key]
+                    callback = self._callbacks.pop(key, None)
+                    if callback:
+                        completed.append(callback)
+            self._in_flight -= 1
+            self._idle.notify_all()
+        self._slots.release()
+        for callback in completed:
+            try:
+                callback()
+            except Exception as e:
+                print(f"File completion callback failed: {e!r}")
+        self._report()
+
+    def _report(self, final: bool = False):
+        now = time.perf_counter()
+        with self._lock:
+            if not final and now - self._last_progress < self.progress_interval:
+                return
+            self._last_progress = now
+            latencies = sorted(self._embed_latencies)
+            done, failed = self.chunks_done, self.chunks_failed
+        elapsed = now - self._started
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0.0
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else 0.0
+        print(
+            f"{'Done' if final else 'Progress'}: {done} chunks ({done / elapsed if elapsed else 0:.1f} chunks/s), "
+            f"{failed} failed, embed latency p50 {p50:.0f}ms p95 {p95:.0f}ms"
+        )
+
+    def close(self):
+        """Send the last partial batch and wait for everything in flight"""
+        self._dispatch()
+        with self._lock:
+            while self._in_flight:
+                self._idle.wait()
+        self._embed_pool.shutdown()
+        self._upsert_pool.shutdown()
+        if self.chunks_done or self.chunks_failed:
+            self._report(final=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
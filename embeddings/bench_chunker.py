@@ -0,0 +1,68 @@
+import time
+import random
+import argparse
+from pathlib import Path
+
+from embeddings.document_loader import chunk_text
+from embeddings.chunker import chunk_spans, count_tokens, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+WORDS = (
+    "the of and to in is for service request cluster pod configuration error timeout retry "
+    "database connection user agent memory cache kubernetes deployment 2024 v1.2 résumé"
+).split()
+
+def synthetic_text(size: int, seed: int = 0) -> str:
+    """Prose-like text of about size characters: sentences of 5-30 words, paragraphs of 1-8 sentences"""
+    rng = random.Random(seed)
+    paragraphs, total = [], 0
+    while total < size:
+        sentences = []
+        for _ in range(rng.randint(1, 8)):
+            words = rng.choices(WORDS, k=rng.randint(5, 30))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+def best_of(fn, repeat: int):
+    """Fastest of repeat runs: (seconds, result)"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run_benchmark(sizes_mb, files=None, max_tokens: int = CHUNK_MAX_TOKENS,
+                  overlap_tokens: int = CHUNK_OVERLAP_TOKENS, repeat: int = 3):
+    inputs = [(f"synthetic {mb:g} MB", synthetic_text(int(mb * 1024 * 1024))) for mb in sizes_mb]
+    inputs += [(str(path), Path(path).read_text(encoding="utf-8", errors="ignore")) for path in files or []]
+
+    print(f"Token chunker: {max_tokens} tokens, {overlap_tokens} overlap. chunk_text: 1000 chars, 200 overlap.")
+    print(f"{'input':<24}{'chunker':<14}{'seconds':>9}{'MB/s':>9}{'chunks':>9}{'max tokens':>12}")
+    for name, text in inputs:
+        mb = len(text.encode("utf-8")) / (1024 * 1024)
+        chars_time, char_chunks = best_of(lambda: chunk_text(text, chunk_size=1000, overlap=200), repeat)
+        tokens_time, spans = best_of(lambda: chunk_spans(text, max_tokens, overlap_tokens), repeat)
+        # Token counts of chunk_text's output are not part of the timed run; chunk_spans returns its own
+        char_max = max((count_tokens(c) for c in char_chunks), default=0)
+        token_max = max((tokens for _, _, tokens in spans), default=0)
+        for label, seconds, chunks, largest in (
+            ("chunk_text", chars_time, len(char_chunks), char_max),
+            ("chunk_spans", tokens_time, len(spans), token_max),
+        ):
+            print(f"{name:<24}{label:<14}{seconds:>9.3f}{mb / seconds if seconds else 0:>9.1f}{chunks:>9}{largest:>12}")
+    print("chunk_spans is slower per MB than chunk_text: it finds every sentence boundary and counts the\n"
+          "tokens of every character (chunk_text only slices fixed windows and never tokenizes). It stays\n"
+          "linear and far faster than embedding, and its fuller chunks mean fewer embedding calls.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare chunk_text with the token-budgeted chunker")
+    parser.add_argument("--sizes", type=float, nargs="*", default=[1, 8, 32], help="synthetic input sizes in MB")
+    parser.add_argument("--file", action="append", default=[], help="also benchmark a text file (repeatable)")
+    parser.add_argument("--max-tokens", type=int, default=CHUNK_MAX_TOKENS)
+    parser.add_argument("--overlap-tokens", type=int, default=CHUNK_OVERLAP_TOKENS)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (fastest is reported)")
+    args = parser.parse_args()
+    run_benchmark(args.sizes, args.file, args.max_tokens, args.overlap_tokens, args.repeat)
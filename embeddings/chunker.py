@@ -0,0 +1,129 @@
+import os
+import re
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, chain
+from typing import List, Tuple
+
+# Token budget per chunk and overlap between neighbouring chunks, in embedding-model tokens
+CHUNK_MAX_TOKENS = int(os.getenv("INGEST_CHUNK_MAX_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("INGEST_CHUNK_OVERLAP_TOKENS", "64"))
+
+# nomic-embed-text uses a BERT WordPiece vocabulary: punctuation and every non-ASCII character
+# are separate tokens, and long or rare words split into pieces. Counting ASCII word runs of
+# up to 6 characters as one token each slightly overestimates, so chunks stay inside the budget.
+TOKEN_RE = re.compile(r"[A-Za-z0-9]{1,6}|\S")
+# Whitespace after terminal punctuation ends a sentence; a blank line ends a paragraph
+BOUNDARY_RE = re.compile(r"[.!?]\s+|\n[ \t\r]*\n\s*")
+
+# Token counting without materializing tokens: text is mapped one byte per character to
+# b"a" (ASCII letter or digit), b" " (whitespace) or b"x" (any other character), and every 6th
+# letter of a run is turned into a space. Tokens are then the b"x" bytes plus the b"a" runs,
+# all counted in C. Counts equal len(TOKEN_RE.findall(text)).
+_TOKEN_CLASSES = bytes(
+    ord("a") if chr(b).isascii() and chr(b).isalnum() else ord(" ") if chr(b).isspace() else ord("x")
+    for b in range(256)
+)
+
+# Non-ASCII whitespace (str.isspace, as matched by \s); other non-ASCII characters encode as "?"
+_UNICODE_SPACE_RE = re.compile(r"[^\x00-\x7f\S]")
+
+def _token_classes(text: str) -> bytes:
+    """Per-character token classes of text, aligned with its character offsets"""
+    if not text.isascii() and _UNICODE_SPACE_RE.search(text):
+        text = _UNICODE_SPACE_RE.sub(" ", text)
+    classes = text.encode("ascii", "replace").translate(_TOKEN_CLASSES)
+    return classes.replace(b"aaaaaa", b"aaaaa ")
+
+def count_tokens(text: str) -> int:
+    """Estimated nomic-embed-text token count"""
+    classes = _token_classes(text)
+    if not classes:
+        return 0
+    return classes.count(b"x") + classes.count(b" a") + classes.count(b"xa") + (classes[0] == 97)  # 97: b"a"
+
+def _sentences(text: str, max_tokens: int) -> Tuple[array, array, array, bytearray]:
+    """
+    One pass over text: (starts, ends, token counts, paragraph flags) of each sentence.
+    A paragraph flag marks a sentence that begins a new paragraph. Sentences longer than
+    max_tokens are cut at token boundaries. Compact arrays keep this small for large files.
+    """
+    starts, ends, tokens, paragraph = array("q"), array("q"), array("q"), bytearray()
+    classes = _token_classes(text)
+    count_in = classes.count
+    pos = len(text) - len(text.lstrip())
+    new_paragraph = False
+    for match in chain(BOUNDARY_RE.finditer(text, pos), (None,)):
+        if match is None:
+            end, next_pos = len(text), len(text)
+        else:
+            end, next_pos = match.span()
+            if text[end] != "\n":
+                end += 1  # keep the punctuation
+        while end > pos and text[end - 1] in " \t\r\n":
+            end -= 1
+        # Same count as count_tokens(text[pos:end]), without slicing
+        count = (count_in(b"x", pos, end) + count_in(b" a", pos, end) + count_in(b"xa", pos, end)
+                 + (classes[pos] == 97)) if end > pos else 0
+        if count and count <= max_tokens:
+            starts.append(pos)
+            ends.append(end)
+            tokens.append(count)
+            paragraph.append(new_paragraph)
+        elif count:
+            spans = [m.span() for m in TOKEN_RE.finditer(text, pos, end)]
+            for i in range(0, len(spans), max_tokens):
+                starts.append(spans[i][0])
+                ends.append(spans[min(i + max_tokens, len(spans)) - 1][1])
+                tokens.append(min(max_tokens, len(spans) - i))
+                paragraph.append(new_paragraph and i == 0)
+        if match is not None:
+            new_paragraph = match.group().count("\n") >= 2
+        pos = next_pos
+    return starts, ends, tokens, paragraph
+
+def chunk_spans(text: str, max_tokens: int = CHUNK_MAX_TOKENS,
+                overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[Tuple[int, int, int]]:
+    """
+    Split text into chunks of at most max_tokens tokens: (start, end, token count) each,
+    with character offsets into text; the count equals count_tokens(text[start:end])
+
+    Whole sentences are packed into each chunk. When the next sentence does not fit, the chunk
+    ends at the last paragraph break if that keeps it at least half full, otherwise at the last
+    sentence. The next chunk repeats up to overlap_tokens tokens of trailing sentences from the
+    same paragraph.
+    Linear in the length of text: boundaries and token counts are computed once, and chunk
+    extents come from prefix sums over the sentence token counts.
+    """
+    max_tokens = max(1, max_tokens)
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    starts, ends, tokens, paragraph = _sentences(text, max_tokens)
+    n = len(starts)
+    if not n:
+        return []
+    prefix = array("q", [0])
+    prefix.extend(accumulate(tokens))  # prefix[k] = tokens of sentences before k
+    spans = []
+    i = 0
+    while i < n:
+        # Furthest j such that sentences i..j-1 fit the budget
+        j = bisect_right(prefix, prefix[i] + max_tokens, i + 1) - 1
+        if j < n:
+            # Prefer a paragraph break inside the chunk if it keeps the chunk at least half full
+            for k in range(j, i, -1):
+                if prefix[k] - prefix[i] < max_tokens // 2:
+                    break
+                if paragraph[k]:
+                    j = k
+                    break
+        spans.append((starts[i], ends[j - 1], prefix[j] - prefix[i]))
+        if j >= n:
+            break
+        # Step back over trailing sentences that fit in the overlap, leaving room for sentence j
+        # so the next chunk always moves forward
+        k = j
+        while (k - 1 > i and not paragraph[k] and prefix[j] - prefix[k - 1] <= overlap_tokens
+               and prefix[j + 1] - prefix[k - 1] <= max_tokens):
+            k -= 1
+        i = k
+    return spans
@@ -1,9 +1,15 @@
+import os
 from backend.services.qdrant_service import qdrant_service
+from embeddings.manifest import MANIFEST_PATH
 
 def wipe_collection():
     client = qdrant_service.client
     client.delete_collection(qdrant_service.collection_name)
     print("Collection deleted")
+    # The manifest describes what the deleted collection held
+    if os.path.exists(MANIFEST_PATH):
+        os.remove(MANIFEST_PATH)
+        print(f"Removed {MANIFEST_PATH}")
 
 if __name__ == "__main__":
     wipe_collection()
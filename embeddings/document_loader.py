@@ -1,10 +1,57 @@
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterator, Iterable, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import mmap
+import os
 import uuid
 
+from embeddings.chunker import chunk_spans, count_tokens, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+# Files at least this large are hashed and decoded through mmap instead of read into a bytes copy
+MMAP_THRESHOLD = 4 * 1024 * 1024
+# Processes chunking files in parallel (1 = in-process)
+LOADER_WORKERS = int(os.getenv("INGEST_LOADER_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Namespace for deterministic chunk point IDs (uuid5)
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c2b52-3f0e-4c1a-9d1e-7a4f0c5b8e21")
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def read_file(path: Path, known_hash: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    Hash and decode a file in one read. Returns (sha256, text); text is None when the
+    hash equals known_hash, so unchanged files are never decoded.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                file_hash = hashlib.sha256(mm).hexdigest()
+                if file_hash == known_hash:
+                    return file_hash, None
+                with memoryview(mm) as view:
+                    return file_hash, str(view, "utf-8", "ignore")
+        data = f.read()
+    file_hash = hashlib.sha256(data).hexdigest()
+    if file_hash == known_hash:
+        return file_hash, None
+    return file_hash, data.decode("utf-8", errors="ignore")
+
+def chunk_id(path: str, chunk_index: int, chunk_hash: str) -> str:
+    """
+    Deterministic point ID: the same chunk text at the same position of the same file
+    always maps to the same ID, so re-ingesting it overwrites instead of duplicating
+    """
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{path}\0{chunk_index}\0{chunk_hash}"))
+
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
     """
-    Split text into overlapping chunks for better context retention.
+    Split text into overlapping chunks of chunk_size characters.
+    Superseded by the token-budgeted chunker in embeddings/chunker.py; kept for comparison
+    (embeddings/bench_chunker.py).
     """
     if len(text) <= chunk_size:
         return [text]
@@ -32,9 +79,111 @@ def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[st
 
     return chunks
 
+def chunk_document(path: Path, text: str, file_hash: str, chunk_documents: bool = True) -> List[Dict]:
+    """
+    Chunk one file's text into token-budgeted chunks (see embeddings/chunker.py)
+
+    Returns:
+        List of document dictionaries with deterministic id, text, and metadata;
+        char_start/char_end locate each chunk in the file's decoded text
+    """
+    docs = []
+    if chunk_documents:
+        spans = chunk_spans(text, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)
+    else:
+        # Keep document as single piece
+        spans = [(0, len(text), count_tokens(text))] if text.strip() else []
+
+    for i, (start, end, tokens) in enumerate(spans):
+        chunk = text[start:end]
+        chunk_hash = content_hash(chunk)
+        meta = {
+            "path": str(path),
+            "source": "local_file",
+            "filename": path.name,
+            "file_hash": file_hash,
+            "content_hash": chunk_hash,
+            "char_start": start,
+            "char_end": end,
+            "token_count": tokens,
+        }
+        if len(spans) > 1:
+            meta.update({"chunk_index": i, "total_chunks": len(spans)})
+        docs.append({"id": chunk_id(str(path), i, chunk_hash), "text": chunk, "meta": meta})
+    return docs
+
+def _load_worker(path: str, known_hash: Optional[str], chunk_documents: bool) -> Tuple[str, Optional[List[Dict]]]:
+    """Process pool task: (sha256, chunks), chunks None when the file matches known_hash"""
+    file_hash, text = read_file(Path(path), known_hash)
+    if text is None:
+        return file_hash, None
+    return file_hash, chunk_document(Path(path), text, file_hash, chunk_documents)
+
+def iter_file_documents(paths: List[Path], known_hashes: Optional[Iterable[Optional[str]]] = None,
+                        chunk_documents: bool = True, workers: int = LOADER_WORKERS
+                        ) -> Iterator[Tuple[Path, Optional[str], Optional[List[Dict]], Optional[Exception]]]:
+    """
+    Lazily load and chunk files, in order, one result per file:
+        (path, sha256, chunks or None if unchanged, error or None)
+
+    With workers > 1 files are chunked in a process pool. At most 2 * workers files are
+    loaded ahead of the consumer, so memory stays flat when the consumer is slower.
+    """
+    items = list(zip(paths, known_hashes if known_hashes is not None else [None] * len(paths)))
+    if workers <= 1 or len(items) <= 1:
+        for path, known_hash in items:
+            try:
+                file_hash, docs = _load_worker(str(path), known_hash, chunk_documents)
+            except Exception as e:
+                yield path, None, None, e
+                continue
+            yield path, file_hash, docs, None
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = deque()
+        queued = iter(items)
+
+        def submit_next():
+            item = next(queued, None)
+            if item is not None:
+                pending.append((item[0], pool.submit(_load_worker, str(item[0]), item[1], chunk_documents)))
+
+        for _ in range(2 * workers):
+            submit_next()
+        while pending:
+            path, future = pending.popleft()
+            submit_next()
+            try:
+                file_hash, docs = future.result()
+            except Exception as e:
+                yield path, None, None, e
+                continue
+            yield path, file_hash, docs, None
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def list_text_files(folder: str) -> List[Path]:
+    folder_path = Path(folder)
+    if not folder_path.exists():
+        print(f"Warning: Folder {folder} does not exist")
+        return []
+    return sorted(folder_path.rglob("*.txt"))
+
+def iter_text_files(folder: str, chunk_documents: bool = True, workers: int = LOADER_WORKERS) -> Iterator[Dict]:
+    """Yield document chunks of every .txt file in folder, file by file"""
+    for path, _, docs, error in iter_file_documents(list_text_files(folder), chunk_documents=chunk_documents,
+                                                    workers=workers):
+        if error is not None:
+            print(f"Error loading {path}: {error}")
+            continue
+        yield from docs
+
 def load_text_files(folder: str, chunk_documents: bool = True) -> List[Dict]:
     """
     Load text files from a folder and optionally chunk them.
+    Materializes every chunk; prefer iter_text_files / iter_file_documents for large corpora.
 
     Args:
         folder: Path to folder containing .txt files
@@ -43,51 +192,11 @@ def load_text_files(folder: str, chunk_documents: bool = True) -> List[Dict]:
     Returns:
         List of document dictionaries with id, text, and metadata
     """
-    docs = []
-    folder_path = Path(folder)
-    if not folder_path.exists():
-        print(f"Warning: Folder {folder} does not exist")
-        return []
-
-    txt_files = list(folder_path.rglob("*.txt"))
+    txt_files = list_text_files(folder)
     if not txt_files:
         print(f"Warning: No .txt files found in {folder}")
         return []
 
-    for path in txt_files:
-        try:
-            text = path.read_text(encoding="utf-8", errors="ignore")
-
-            if chunk_documents and len(text) > 1000:
-                # Split large documents into chunks
-                chunks = chunk_text(text, chunk_size=1000, overlap=200)
-                for i, chunk in enumerate(chunks):
-                    if chunk.strip():  # Skip empty chunks
-                        docs.append({
-                            "id": str(uuid.uuid4()),
-                            "text": chunk,
-                            "meta": {
-                                "path": str(path),
-                                "source": "local_file",
-                                "filename": path.name,
-                                "chunk_index": i,
-                                "total_chunks": len(chunks),
-                            },
-                        })
-            else:
-                # Keep document as single piece
-                docs.append({
-                    "id": str(uuid.uuid4()),
-                    "text": text,
-                    "meta": {
-                        "path": str(path),
-                        "source": "local_file",
-                        "filename": path.name,
-                    },
-                })
-        except Exception as e:
-            print(f"Error loading {path}: {e}")
-            continue
-
+    docs = list(iter_text_files(folder, chunk_documents))
     print(f"Loaded {len(docs)} document chunks from {len(txt_files)} files")
     return docs
@@ -1,4 +1,6 @@
-import os
+import time
+import argparse
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -6,33 +8,133 @@ from dotenv import load_dotenv
 backend_env = Path(__file__).parent.parent / "backend" / ".env"
 load_dotenv(backend_env)
 
-from embeddings.document_loader import load_text_files
+from embeddings.document_loader import list_text_files, iter_file_documents, LOADER_WORKERS
+from embeddings.manifest import IngestionManifest, MANIFEST_PATH
+from embeddings.batch_ingestor import BatchIngestor, EMBED_BATCH_SIZE, EMBED_CONCURRENCY
 from backend.services.embeddings_service import embeddings_service
 from backend.services.qdrant_service import qdrant_service
 
-def run_ingestion():
-    docs = load_text_files("data/docs")
-    texts = [d["text"] for d in docs]
-    if not texts:
-        print("No docs found in data/docs")
+def run_ingestion(folder: str = "data/docs", manifest_path: str = MANIFEST_PATH, full: bool = False,
+                  batch_size: int = EMBED_BATCH_SIZE, embed_concurrency: int = EMBED_CONCURRENCY,
+                  workers: int = LOADER_WORKERS):
+    """
+    Incremental ingestion: only new or changed chunks are embedded
+
+    - files with the manifest's size and mtime are skipped without being read
+    - files with the manifest's content hash are skipped without being chunked
+    - other files are read and chunked lazily, in a process pool of `workers`, a few files
+      ahead of the embedder, so peak memory does not grow with the corpus
+    - chunks of changed files whose ID (path + index + content hash) is already stored are kept;
+      the rest are embedded, and the file's stale points are deleted by payload filter
+    - points of files that no longer exist are deleted
+    - embedding and upserts are pipelined in bounded batches (see BatchIngestor); a file is
+      recorded in the manifest only once all of its new chunks are stored
+    """
+    start = time.perf_counter()
+    manifest = IngestionManifest(manifest_path, qdrant_service.collection_name)
+    if full or (manifest.files and qdrant_service.count() == 0):
+        # Full rebuild, or the collection was wiped since the manifest was written
+        manifest.reset()
+
+    files = list_text_files(folder)
+    if not files and not manifest.files:
+        print(f"No docs found in {folder}")
         return
-    vectors = embeddings_service.embed_texts(texts)
-
-    qdrant_docs = []
-    for d, v in zip(docs, vectors):
-        qdrant_docs.append(
-            {
-                "id": d["id"],
-                "vector": v,
-                "payload": {
-                    "text": d["text"],
-                    **d["meta"],
-                },
-            }
+
+    unchanged, changed, embedded, reused = 0, 0, 0, 0
+    manifest_lock = threading.Lock()
+    last_save = [time.monotonic()]
+
+    def record(key, file_hash, stat, chunk_ids):
+        with manifest_lock:
+            manifest.record(key, file_hash, stat, chunk_ids)
+            # Saved periodically so an interrupted run resumes close to where it stopped
+            if time.monotonic() - last_save[0] > 5:
+                manifest.save()
+                last_save[0] = time.monotonic()
+
+    def replace_file(key, file_hash, stat, chunk_ids):
+        # Runs on an upsert thread once the file's new chunks are stored. Only then are its
+        # changed chunks (and points from runs without a manifest) deleted, so the file stays
+        # searchable throughout and a file whose chunks failed keeps its previous points.
+        qdrant_service.delete_by_path(key, keep_ids=chunk_ids)
+        record(key, file_hash, stat, chunk_ids)
+
+    ingestor = BatchIngestor(
+        embeddings_service.embed_texts, qdrant_service.upsert_documents,
+        batch_size=batch_size, embed_concurrency=embed_concurrency,
+    )
+    candidates = []
+    for path in files:
+        key = str(path)
+        stat = path.stat()
+        if manifest.unchanged(key, stat):
+            unchanged += 1
+            continue
+        candidates.append((path, stat, manifest.get(key)))
+
+    loaded = iter_file_documents(
+        [path for path, _, _ in candidates],
+        known_hashes=[entry["sha256"] if entry else None for _, _, entry in candidates],
+        workers=workers,
+    )
+    for (path, stat, entry), (_, file_hash, docs, error) in zip(candidates, loaded):
+        key = str(path)
+        if error is not None:
+            print(f"Error loading {path}: {error}")
+            continue
+        if docs is None:
+            # Touched but identical
+            record(key, file_hash, stat, entry["chunk_ids"])
+            unchanged += 1
+            continue
+
+        stored = set(entry["chunk_ids"]) if entry else set()
+        new_docs = [d for d in docs if d["id"] not in stored]
+        kept_ids = [d["id"] for d in docs if d["id"] in stored]
+        if kept_ids:
+            # Same text at the same position: keep the vector, refresh file-level fields and
+            # offsets (an edit earlier in the file shifts them)
+            qdrant_service.set_payloads({
+                d["id"]: {
+                    field: d["meta"][field]
+                    for field in ("file_hash", "total_chunks", "char_start", "char_end")
+                    if field in d["meta"]
+                }
+                for d in docs if d["id"] in stored
+            })
+        chunk_ids = [d["id"] for d in docs]
+        ingestor.add_file(
+            key, new_docs,
+            on_complete=lambda key=key, file_hash=file_hash, stat=stat, chunk_ids=chunk_ids:
+                replace_file(key, file_hash, stat, chunk_ids),
         )
+        changed += 1
+        embedded += len(new_docs)
+        reused += len(kept_ids)
+
+    ingestor.close()
+
+    current = {str(path) for path in files}
+    removed = [key for key in manifest.files if key not in current]
+    for key in removed:
+        qdrant_service.delete_by_path(key)
+        manifest.remove(key)
+    manifest.save()
 
-    qdrant_service.upsert_documents(qdrant_docs)
-    print(f"Ingested {len(qdrant_docs)} docs into Qdrant.")
+    print(
+        f"Files: {unchanged} unchanged, {changed} new/changed, {len(removed)} removed. "
+        f"Chunks: {embedded - ingestor.chunks_failed} embedded, {reused} reused, {ingestor.chunks_failed} failed "
+        f"({ingestor.embed_calls} embedding calls, {ingestor.retries} retries). ({time.perf_counter() - start:.1f}s)"
+    )
 
 if __name__ == "__main__":
-    run_ingestion()
+    parser = argparse.ArgumentParser(description="Ingest data/docs into Qdrant (incremental)")
+    parser.add_argument("--folder", default="data/docs")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and re-embed every file")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="chunks per embedding request")
+    parser.add_argument("--concurrency", type=int, default=EMBED_CONCURRENCY, help="embedding requests in flight")
+    parser.add_argument("--workers", type=int, default=LOADER_WORKERS, help="processes loading and chunking files")
+    args = parser.parse_args()
+    run_ingestion(args.folder, args.manifest, args.full, args.batch_size, args.concurrency, args.workers)
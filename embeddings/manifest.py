@@ -0,0 +1,61 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MANIFEST_VERSION = 1
+MANIFEST_PATH = os.getenv("INGESTION_MANIFEST", "data/ingestion_manifest.json")
+
+class IngestionManifest:
+    """
+    Record of what is already in Qdrant, per source file:
+        {path: {"sha256": ..., "mtime": ..., "size": ..., "chunk_ids": [...]}}
+
+    Files whose size and mtime match are skipped without being read; files whose content
+    hash matches are skipped without being re-chunked.
+    """
+
+    def __init__(self, path: str, collection: str):
+        self.path = Path(path)
+        self.collection = collection
+        self.files: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("version") == MANIFEST_VERSION and data.get("collection") == collection:
+                    self.files = data.get("files", {})
+                else:
+                    print(f"Ignoring manifest {self.path}: written for another collection or version")
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable manifest {self.path}: {e}")
+
+    def get(self, path: str) -> Optional[Dict]:
+        return self.files.get(path)
+
+    def unchanged(self, path: str, stat: os.stat_result) -> bool:
+        entry = self.files.get(path)
+        return bool(entry) and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime
+
+    def record(self, path: str, sha256: str, stat: os.stat_result, chunk_ids: List[str]):
+        self.files[path] = {
+            "sha256": sha256,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "chunk_ids": chunk_ids,
+        }
+
+    def remove(self, path: str):
+        self.files.pop(path, None)
+
+    def reset(self):
+        self.files = {}
+
+    def save(self):
+        """Write atomically so an interrupted run leaves the previous manifest intact"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps({"version": MANIFEST_VERSION, "collection": self.collection, "files": self.files}, indent=1),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
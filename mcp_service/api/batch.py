@@ -0,0 +1,66 @@
+"""
+Batch Tool Execution
+Runs a list of tool invocations concurrently under the per-tool bulkheads
+"""
+import os
+import json
+import time
+import asyncio
+from typing import Dict, Any, List, Tuple, Callable, Type, AsyncIterator
+from pydantic import BaseModel
+from mcp_service.api.bulkhead import bulkheads, BulkheadFull
+from mcp_service.api.schemas import ToolInvocation, ToolResult
+from mcp_service.utils.logger import logger
+
+BATCH_MAX_INVOCATIONS = int(os.getenv("MCP_BATCH_MAX_INVOCATIONS", "50"))
+
+ToolHandlers = Dict[str, Tuple[Type[BaseModel], Callable[[Any], BaseModel]]]
+
+
+async def _invoke(index: int, invocation: ToolInvocation, handlers: ToolHandlers) -> ToolResult:
+    invocation_id = invocation.id or str(index)
+    start = time.perf_counter()
+    try:
+        request_model, handler = handlers[invocation.tool]
+        request = request_model(**invocation.args)
+        # Same per-tool bulkheads as the single-tool routes; a full queue fails this invocation only
+        response = await bulkheads[invocation.tool].run(handler, request)
+        result = response.model_dump()
+        success = result.get("success", result.get("error") is None)
+        return ToolResult(
+            id=invocation_id,
+            tool=invocation.tool,
+            success=bool(success),
+            result=result,
+            error=result.get("error"),
+            elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+    except Exception as e:
+        if isinstance(e, BulkheadFull):
+            logger.warning(f"[batch] {invocation.tool} invocation {invocation_id} rejected: {e}")
+        else:
+            logger.error(f"[batch] {invocation.tool} invocation {invocation_id} failed: {e}")
+        return ToolResult(
+            id=invocation_id,
+            tool=invocation.tool,
+            success=False,
+            error=str(e),
+            elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+
+
+async def run_batch(invocations: List[ToolInvocation], handlers: ToolHandlers) -> List[ToolResult]:
+    """Execute all invocations concurrently, results in request order"""
+    return await asyncio.gather(*(_invoke(i, inv, handlers) for i, inv in enumerate(invocations)))
+
+
+async def stream_batch(invocations: List[ToolInvocation], handlers: ToolHandlers) -> AsyncIterator[str]:
+    """Execute all invocations concurrently, yielding one NDJSON line per result as it finishes"""
+    tasks = [asyncio.create_task(_invoke(i, inv, handlers)) for i, inv in enumerate(invocations)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            yield json.dumps(result.model_dump(), default=str) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
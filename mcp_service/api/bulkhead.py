@@ -0,0 +1,102 @@
+"""
+Per-Tool Bulkheads
+Each tool (rag, db, plan) gets its own worker-thread capacity and a bounded wait
+queue, so a burst of slow web plans cannot starve cheap RAG searches. When a
+tool's queue is full, requests are rejected immediately instead of waiting
+until they time out.
+"""
+import os
+import threading
+from typing import Any, Callable, Dict
+import anyio
+import anyio.to_thread
+from mcp_service.utils.logger import logger
+
+# "<tool>=<limit>" pairs: concurrent worker threads and waiting requests per tool
+BULKHEAD_CONCURRENCY = os.getenv("MCP_BULKHEAD_CONCURRENCY", "rag=16,db=8,plan=4")
+BULKHEAD_QUEUE = os.getenv("MCP_BULKHEAD_QUEUE", "rag=64,db=32,plan=8")
+BULKHEAD_RETRY_AFTER = int(os.getenv("MCP_BULKHEAD_RETRY_AFTER", "2"))
+
+
+def parse_tool_limits(spec: str) -> Dict[str, int]:
+    """Parse "rag=16,db=8" into {"rag": 16, "db": 8}"""
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            tool, limit = item.split("=", 1)
+            limits[tool.strip()] = max(0, int(limit))
+    return limits
+
+
+class BulkheadFull(Exception):
+    """Raised when a tool's concurrency slots and wait queue are both full"""
+
+    def __init__(self, tool: str, retry_after: int):
+        super().__init__(f"Tool '{tool}' is at capacity, retry in {retry_after}s")
+        self.tool = tool
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """
+    Concurrency limit plus bounded queue for one tool's blocking handler
+
+    Usage:
+        result = await bulkhead.run(handler, request)   # raises BulkheadFull
+    """
+
+    def __init__(self, tool: str, max_concurrent: int, max_queue: int, retry_after: int = BULKHEAD_RETRY_AFTER):
+        self.tool = tool
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        # Dedicated thread capacity; the default anyio limiter is shared by every sync route
+        self._limiter = anyio.CapacityLimiter(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._accepted = 0
+        self._rejected = 0
+        self._failed = 0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._pending >= self.max_concurrent + self.max_queue:
+                self._rejected += 1
+                raise BulkheadFull(self.tool, self.retry_after)
+            self._pending += 1
+            self._accepted += 1
+        try:
+            return await anyio.to_thread.run_sync(fn, *args, limiter=self._limiter)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = int(self._limiter.borrowed_tokens)
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "active": active,
+                "queued": max(0, self._pending - active),
+                "accepted": self._accepted,
+                "rejected": self._rejected,
+                "failed": self._failed,
+            }
+
+
+_concurrency = parse_tool_limits(BULKHEAD_CONCURRENCY)
+_queue = parse_tool_limits(BULKHEAD_QUEUE)
+
+bulkheads: Dict[str, Bulkhead] = {
+    tool: Bulkhead(tool, _concurrency.get(tool, 4), _queue.get(tool, 16))
+    for tool in ("rag", "db", "plan")
+}
+
+logger.info(
+    "[bulkhead] " + ", ".join(f"{b.tool}: {b.max_concurrent} workers/{b.max_queue} queued" for b in bulkheads.values())
+)
@@ -1,21 +1,34 @@
-from fastapi import APIRouter
-from api.schemas import PlanRequest, PlanResponse, RAGRequest, RAGResponse, DBRequest, DBResponse
-from planner.mcp_planner import run_mcp_plan
-from tools.rag_tool import search_documents
-from tools.db_tool import query_database
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from mcp_service.api.schemas import (
+    PlanRequest, PlanResponse, RAGRequest, RAGResponse, DBRequest, DBResponse,
+    CacheInvalidateRequest, CacheInvalidateResponse, BatchRequest, BatchResponse,
+)
+from mcp_service.api.batch import run_batch, stream_batch, BATCH_MAX_INVOCATIONS
+from mcp_service.api.bulkhead import bulkheads, BulkheadFull
+from mcp_service.planner.mcp_planner import run_mcp_plan
+from mcp_service.tools.rag_tool import search_documents
+from mcp_service.tools.db_tool import query_database
+from mcp_service.tools.sql_cache import sql_result_cache
+from mcp_service.tools.http_cache import web_cache
 
 router = APIRouter()
 
-@router.post("/plan", response_model=PlanResponse)
-def plan(req: PlanRequest):
+async def _run_in_bulkhead(tool: str, handler, req):
+    """Run a blocking tool handler in its bulkhead; 503 + Retry-After when the tool is saturated"""
+    try:
+        return await bulkheads[tool].run(handler, req)
+    except BulkheadFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def _plan_sync(req: PlanRequest) -> PlanResponse:
     try:
-        data = run_mcp_plan(req.plan)
+        data = run_mcp_plan(req.plan, req.query)
         return PlanResponse(results=data.get("results", []))
     except Exception as e:
         return PlanResponse(results=[], error=str(e))
 
-@router.post("/rag", response_model=RAGResponse)
-def rag_search(req: RAGRequest):
+def _rag_search_sync(req: RAGRequest) -> RAGResponse:
     """
     Execute RAG (Retrieval-Augmented Generation) search
     Searches vector database for relevant documents
@@ -35,8 +48,7 @@ def rag_search(req: RAGRequest):
             error=str(e)
         )
 
-@router.post("/db", response_model=DBResponse)
-def db_query(req: DBRequest):
+def _db_query_sync(req: DBRequest) -> DBResponse:
     """
     Execute database query with natural language
     Generates and executes SQL with safety validations
@@ -47,7 +59,11 @@ def db_query(req: DBRequest):
             success=result.get("success", False),
             results=result.get("results", []),
             sql=result.get("sql"),
+            params=result.get("params"),
+            template=result.get("template"),
             row_count=result.get("row_count", 0),
+            cached=result.get("cached", False),
+            cost_guard=result.get("cost_guard"),
             error=result.get("error")
         )
     except Exception as e:
@@ -57,6 +73,61 @@ def db_query(req: DBRequest):
             error=str(e)
         )
 
+@router.post("/plan", response_model=PlanResponse)
+async def plan(req: PlanRequest):
+    return await _run_in_bulkhead("plan", _plan_sync, req)
+
+@router.post("/rag", response_model=RAGResponse)
+async def rag_search(req: RAGRequest):
+    return await _run_in_bulkhead("rag", _rag_search_sync, req)
+
+@router.post("/db", response_model=DBResponse)
+async def db_query(req: DBRequest):
+    return await _run_in_bulkhead("db", _db_query_sync, req)
+
+BATCH_HANDLERS = {
+    "rag": (RAGRequest, _rag_search_sync),
+    "db": (DBRequest, _db_query_sync),
+    "plan": (PlanRequest, _plan_sync),
+}
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch(req: BatchRequest):
+    """
+    Execute several tool invocations (rag, db, plan) concurrently in one request
+    With stream=true, results are returned as NDJSON lines in completion order
+    """
+    if len(req.invocations) > BATCH_MAX_INVOCATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_INVOCATIONS} invocations per batch")
+    if req.stream:
+        return StreamingResponse(stream_batch(req.invocations, BATCH_HANDLERS), media_type="application/x-ndjson")
+    results = await run_batch(req.invocations, BATCH_HANDLERS)
+    return BatchResponse(results=results)
+
+@router.post("/db/cache/invalidate", response_model=CacheInvalidateResponse)
+def db_cache_invalidate(req: CacheInvalidateRequest):
+    """
+    Invalidate cached SQL results for the given tables (all tables if omitted)
+    Call after writes to users/orders/user_sessions that bypass the NOTIFY triggers
+    """
+    invalidated = sql_result_cache.invalidate_tables(req.tables)
+    return CacheInvalidateResponse(invalidated=invalidated, tables=req.tables)
+
+@router.get("/db/cache/stats")
+def db_cache_stats():
+    """SQL result cache statistics"""
+    return sql_result_cache.stats()
+
+@router.get("/plan/cache/stats")
+def web_cache_stats():
+    """Persistent web search/page cache statistics"""
+    return web_cache.stats()
+
+@router.get("/bulkheads/stats")
+def bulkhead_stats():
+    """Per-tool bulkhead metrics: active workers, queue depth, accepted/rejected counts"""
+    return {tool: bulkhead.stats() for tool, bulkhead in bulkheads.items()}
+
 @router.get("/health")
 def health():
     """Health check endpoint"""
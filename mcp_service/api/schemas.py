@@ -1,8 +1,9 @@
 from pydantic import BaseModel
-from typing import Any, List, Dict, Optional
+from typing import Any, List, Dict, Optional, Literal
 
 class PlanRequest(BaseModel):
     plan: str
+    query: Optional[str] = None  # original user question, used to rank page passages
 
 class PlanResponse(BaseModel):
     results: List[Dict[str, Any]]
@@ -25,6 +26,36 @@ class DBResponse(BaseModel):
     success: bool
     results: List[Dict[str, Any]]
     sql: Optional[str] = None
+    params: Optional[Dict[str, Any]] = None
+    template: Optional[str] = None
     row_count: int = 0
+    cached: bool = False
+    cost_guard: Optional[Dict[str, Any]] = None  # decision, plan summary, reason
     error: Optional[str] = None
 
+class CacheInvalidateRequest(BaseModel):
+    tables: Optional[List[str]] = None  # None invalidates every cached result
+
+class CacheInvalidateResponse(BaseModel):
+    invalidated: int
+    tables: Optional[List[str]] = None
+
+class ToolInvocation(BaseModel):
+    tool: Literal["rag", "db", "plan"]
+    args: Dict[str, Any]  # body of the matching single-tool request
+    id: Optional[str] = None  # echoed back; defaults to the invocation's index
+
+class BatchRequest(BaseModel):
+    invocations: List[ToolInvocation]
+    stream: bool = False  # stream NDJSON results as each tool finishes
+
+class ToolResult(BaseModel):
+    id: str
+    tool: str
+    success: bool
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+class BatchResponse(BaseModel):
+    results: List[ToolResult]
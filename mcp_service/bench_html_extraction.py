@@ -0,0 +1,87 @@
+"""
+Microbenchmark: streaming visible-text extraction vs the full BeautifulSoup path
+
+Usage (from the project root):
+    python -m mcp_service.bench_html_extraction [--size-kb 2048] [--max-length 1000] [--runs 5]
+"""
+import argparse
+import time
+from bs4 import BeautifulSoup
+from mcp_service.tools.html_text import VisibleTextParser
+
+CHUNK_SIZE = 8192
+
+
+def build_page(size_kb: int) -> str:
+    head = "<html><head><title>Bench</title><style>body { color: #333; }</style></head><body>"
+    nav = "<header><nav>" + "".join(f'<a href="/s{i}">Section {i}</a>' for i in range(50)) + "</nav></header>"
+    block = (
+        "<div class='content'><h2>Heading</h2>"
+        "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+        "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam.</p>"
+        "<script>var tracking = {id: 42, events: ['a', 'b', 'c']};</script></div>"
+    )
+    body = []
+    size = len(head) + len(nav)
+    while size < size_kb * 1024:
+        body.append(block)
+        size += len(block)
+    return head + nav + "".join(body) + "<footer>Footer links</footer></body></html>"
+
+
+def beautifulsoup_extract(html: str, max_length: int) -> str:
+    """The previous fetch_url_content extraction: full tree, decompose, then truncate"""
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = ' '.join(chunk for chunk in chunks if chunk)
+    return text[:max_length]
+
+
+def streaming_extract(html: str, max_length: int, max_bytes: int) -> str:
+    """The new path: chunked feed, stop at max_length of text or max_bytes of body"""
+    parser = VisibleTextParser(max_length)
+    received = 0
+    for start in range(0, len(html), CHUNK_SIZE):
+        chunk = html[start:start + CHUNK_SIZE]
+        received += len(chunk)
+        parser.feed(chunk)
+        if parser.done or received >= max_bytes:
+            break
+    return parser.result()
+
+
+def timed(fn, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-kb", type=int, default=2048)
+    parser.add_argument("--max-length", type=int, default=1000)
+    parser.add_argument("--max-bytes", type=int, default=512 * 1024)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    html = build_page(args.size_kb)
+    bs_time = timed(lambda: beautifulsoup_extract(html, args.max_length), args.runs)
+    stream_time = timed(lambda: streaming_extract(html, args.max_length, args.max_bytes), args.runs)
+
+    sample = streaming_extract(html, args.max_length, args.max_bytes)
+    print(f"Page size:        {len(html) / 1024:.0f} KB, max_length={args.max_length}")
+    print(f"BeautifulSoup:    {bs_time * 1000:8.2f} ms (best of {args.runs})")
+    print(f"Streaming parser: {stream_time * 1000:8.2f} ms (best of {args.runs})")
+    print(f"Speedup:          {bs_time / stream_time:8.1f}x")
+    print(f"Sample output:    {sample[:80]!r}")
+
+
+if __name__ == "__main__":
+    main()
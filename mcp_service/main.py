@@ -1,8 +1,15 @@
 from fastapi import FastAPI
-from api.routes import router as api_router
+from mcp_service.api.routes import router as api_router
+from mcp_service.tools.db_tool import POSTGRES_DSN
+from mcp_service.tools.sql_cache import sql_result_cache, start_invalidation_listener
 
 app = FastAPI(title="MCP Microservice")
 
+@app.on_event("startup")
+async def startup_event():
+    # Postgres LISTEN/NOTIFY based cache invalidation (opt-in via SQL_CACHE_LISTEN)
+    start_invalidation_listener(POSTGRES_DSN, sql_result_cache)
+
 app.include_router(api_router)
 
 @app.get("/health")
@@ -1,8 +1,8 @@
-from typing import Dict, Any
-from tools.web_tool import execute_web_plan
+from typing import Dict, Any, Optional
+from mcp_service.tools.web_tool import execute_web_plan
 
-def run_mcp_plan(plan: str) -> Dict[str, Any]:
-    web_results = execute_web_plan(plan)
+def run_mcp_plan(plan: str, query: Optional[str] = None) -> Dict[str, Any]:
+    web_results = execute_web_plan(plan, query)
     return {
         "results": web_results
     }
@@ -0,0 +1,68 @@
+"""
+Incremental visible-text extraction for fetched web pages
+Feeds HTML chunk by chunk and stops as soon as enough text has been collected,
+instead of building a full BeautifulSoup tree for the whole body
+"""
+from html.parser import HTMLParser
+from typing import List
+
+# Elements whose contents are never visible page text
+SKIP_TAGS = {"script", "style", "nav", "footer", "header", "noscript", "template", "svg", "head"}
+
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+
+def is_text_content(content_type: str) -> bool:
+    """True for HTML/plain-text responses (or when the server sent no Content-Type)"""
+    if not content_type:
+        return True
+    return content_type.split(";", 1)[0].strip().lower() in TEXT_CONTENT_TYPES
+
+
+class VisibleTextParser(HTMLParser):
+    """
+    Streaming tag stripper that collects whitespace-normalized visible text
+
+    Usage:
+        parser = VisibleTextParser(max_length=1000)
+        for chunk in chunks:
+            parser.feed(chunk)
+            if parser.done:
+                break
+        text = parser.result()
+    """
+
+    def __init__(self, max_length: int):
+        super().__init__(convert_charrefs=True)
+        self.max_length = max_length
+        self.done = False
+        self._skip_depth = 0
+        self._parts: List[str] = []
+        self._length = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth > 0:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth or self.done:
+            return
+        words = data.split()
+        if not words:
+            return
+        text = " ".join(words)
+        self._parts.append(text)
+        self._length += len(text) + 1
+        if self._length >= self.max_length:
+            self.done = True
+
+    def feed(self, data: str):
+        if not self.done:
+            super().feed(data)
+
+    def result(self) -> str:
+        return " ".join(self._parts)[:self.max_length]
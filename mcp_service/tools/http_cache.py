@@ -0,0 +1,202 @@
+"""
+Persistent HTTP Response Cache for the Web Tool
+SQLite-backed store for search results and extracted page text with per-source
+TTLs, ETag/Last-Modified revalidation, stale-while-revalidate and size-based eviction
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, Callable
+from mcp_service.utils.logger import logger
+
+WEB_CACHE_ENABLED = os.getenv("WEB_CACHE_ENABLED", "true").lower() == "true"
+WEB_CACHE_PATH = os.getenv("WEB_CACHE_PATH", "/tmp/mcp_web_cache.sqlite3")
+WEB_CACHE_MAX_BYTES = int(os.getenv("WEB_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# kind -> (ttl seconds, extra seconds a stale entry may still be served while revalidating)
+WEB_CACHE_POLICIES = {
+    "search": (int(os.getenv("WEB_CACHE_SEARCH_TTL", "3600")), int(os.getenv("WEB_CACHE_SEARCH_STALE_TTL", "86400"))),
+    "page": (int(os.getenv("WEB_CACHE_PAGE_TTL", "86400")), 0),
+}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    body TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache(last_access);
+"""
+
+
+class HTTPCache:
+    """
+    Disk-backed response cache shared by all workers on the node
+
+    Entries store the parsed body (search results or extracted page text), not
+    raw HTML, together with the validators needed for conditional requests.
+    """
+
+    def __init__(self, path: str = WEB_CACHE_PATH, max_bytes: int = WEB_CACHE_MAX_BYTES):
+        self.enabled = WEB_CACHE_ENABLED
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self._conn = self._connect() if self.enabled else None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA_SQL)
+            logger.info(f"[http_cache] Web cache at {self.path}")
+            return conn
+        except Exception as e:
+            logger.warning(f"[http_cache] Cache disabled, could not open {self.path}: {e}")
+            self.enabled = False
+            return None
+
+    def lookup(self, key: str, kind: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached entry with freshness flags, or None on miss
+
+        fresh: within TTL, serve without network
+        stale_usable: past TTL but inside the stale window, serve and revalidate in background
+        """
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT body, etag, last_modified, expires_at FROM http_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if not row:
+                    return None
+                now = time.time()
+                self._conn.execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        except Exception as e:
+            logger.warning(f"[http_cache] Lookup failed: {e}")
+            return None
+
+        body, etag, last_modified, expires_at = row
+        _, stale_ttl = WEB_CACHE_POLICIES[kind]
+        return {
+            "body": json.loads(body),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": now < expires_at,
+            "stale_usable": now < expires_at + stale_ttl,
+        }
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, key: str, kind: str, url: str, body: Any, response_headers=None):
+        """Store a parsed body with the response's validators and evict down to max_bytes"""
+        if not self.enabled or not body:
+            return
+        payload = json.dumps(body)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes // 10:
+            return
+        headers = response_headers or {}
+        ttl, _ = WEB_CACHE_POLICIES[kind]
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO http_cache "
+                    "(key, kind, url, body, etag, last_modified, fetched_at, expires_at, last_access, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, kind, url, payload, headers.get("etag"), headers.get("last-modified"),
+                     now, now + ttl, now, size),
+                )
+                self._evict()
+                self._conn.commit()
+        except Exception as e:
+            logger.warning(f"[http_cache] Store failed: {e}")
+
+    def touch(self, key: str, kind: str):
+        """Extend an entry's lifetime after a 304 Not Modified"""
+        if not self.enabled:
+            return
+        ttl, _ = WEB_CACHE_POLICIES[kind]
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE http_cache SET expires_at = ?, fetched_at = ?, last_access = ? WHERE key = ?",
+                    (now + ttl, now, now, key),
+                )
+                self._conn.commit()
+        except Exception as e:
+            logger.warning(f"[http_cache] Touch failed: {e}")
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until 90% of the cap
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM http_cache ORDER BY last_access ASC"):
+            victims.append((key,))
+            freed += size
+            if total - freed <= target:
+                break
+        self._conn.executemany("DELETE FROM http_cache WHERE key = ?", victims)
+        logger.info(f"[http_cache] Evicted {len(victims)} entries ({freed} bytes)")
+
+    def revalidate_in_background(self, key: str, refresh: Callable[[], None]):
+        """Run refresh() in a daemon thread unless a revalidation for key is already running"""
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def _run():
+            try:
+                refresh()
+            except Exception as e:
+                logger.warning(f"[http_cache] Background revalidation failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=_run, name="web-cache-revalidate", daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM http_cache GROUP BY kind"
+            ).fetchall()
+        return {
+            "enabled": True,
+            "max_bytes": self.max_bytes,
+            "kinds": {kind: {"entries": count, "bytes": size} for kind, count, size in rows},
+        }
+
+
+web_cache = HTTPCache()
@@ -0,0 +1,22 @@
+"""
+LLM Call Gate
+Every LLM generation made by the MCP tools runs inside llm_slot(priority).
+Standalone, the gate is a no-op. When the tools run embedded in the backend
+(MCP_TRANSPORT=embedded), the backend installs its LLM scheduler here, so these
+calls share its admission control and priority classes.
+"""
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Optional
+
+_slot_factory: Optional[Callable[[str], ContextManager]] = None
+
+
+def set_llm_slot_factory(factory: Optional[Callable[[str], ContextManager]]):
+    """Install (or with None, remove) the context manager factory wrapping LLM calls"""
+    global _slot_factory
+    _slot_factory = factory
+
+
+def llm_slot(priority: str) -> ContextManager:
+    factory = _slot_factory
+    return factory(priority) if factory is not None else nullcontext()
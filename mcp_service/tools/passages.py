@@ -0,0 +1,115 @@
+"""
+Passage Selection for Web Context
+Splits fetched page text into passages and keeps only the ones most relevant
+to the question, scored with one batched embedding call
+"""
+import os
+import re
+import math
+import asyncio
+from typing import List, Dict, Any, Optional
+import httpx
+from mcp_service.utils.logger import logger
+
+OLLAMA_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
+
+WEB_PASSAGE_CHARS = int(os.getenv("WEB_PASSAGE_CHARS", "400"))
+WEB_TOP_PASSAGES = int(os.getenv("WEB_TOP_PASSAGES", "5"))
+WEB_CONTEXT_CHARS = int(os.getenv("WEB_CONTEXT_CHARS", "2000"))
+WEB_MIN_PASSAGE_CHARS = 40
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+def split_passages(text: str, size: int = WEB_PASSAGE_CHARS) -> List[str]:
+    """Pack sentences into passages of at most ~size characters"""
+    passages, current = [], ""
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        # Hard-wrap sentences longer than a whole passage (menus, run-on text)
+        while len(sentence) > size:
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(sentence[:size])
+            sentence = sentence[size:]
+        if current and len(current) + len(sentence) + 1 > size:
+            passages.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        passages.append(current)
+    return [p for p in passages if len(p) >= WEB_MIN_PASSAGE_CHARS]
+
+
+async def embed_texts_async(client: httpx.AsyncClient, texts: List[str]) -> List[List[float]]:
+    """Embed a batch of texts in a single Ollama /api/embed request"""
+    response = await client.post(
+        f"{OLLAMA_URL}/api/embed",
+        json={"model": EMBEDDING_MODEL, "input": texts},
+    )
+    response.raise_for_status()
+    return response.json().get("embeddings", [])
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _lexical_score(query: str, passage: str) -> float:
+    query_terms = set(re.findall(r'[a-z0-9]{3,}', query.lower()))
+    if not query_terms:
+        return 0.0
+    passage_terms = set(re.findall(r'[a-z0-9]{3,}', passage.lower()))
+    return len(query_terms & passage_terms) / len(query_terms)
+
+
+async def select_passages(client: httpx.AsyncClient, query: str, candidates: List[Dict[str, Any]],
+                          top_k: int = WEB_TOP_PASSAGES, budget: int = WEB_CONTEXT_CHARS,
+                          timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Rank candidate passages against the query and keep the best within budget
+
+    Args:
+        candidates: dicts with at least "text" (other keys are carried through)
+        top_k: maximum number of passages to keep
+        budget: maximum total characters across kept passages
+        timeout: seconds to wait for embeddings before falling back to lexical scoring
+
+    Returns:
+        Selected candidates with an added "score", best first
+    """
+    if not candidates:
+        return []
+
+    scores: Optional[List[float]] = None
+    if timeout is not None and timeout <= 0:
+        logger.info("[passages] No time left for embeddings, using lexical scoring")
+    else:
+        try:
+            vectors = await asyncio.wait_for(
+                embed_texts_async(client, [query] + [c["text"] for c in candidates]), timeout
+            )
+            if len(vectors) == len(candidates) + 1:
+                scores = [_cosine(vectors[0], v) for v in vectors[1:]]
+        except Exception as e:
+            logger.warning(f"[passages] Embedding failed, using lexical scoring: {e!r}")
+    if scores is None:
+        scores = [_lexical_score(query, c["text"]) for c in candidates]
+
+    ranked = sorted(zip(scores, candidates), key=lambda pair: pair[0], reverse=True)
+    selected, used = [], 0
+    for score, candidate in ranked:
+        if len(selected) >= top_k:
+            break
+        if score <= 0 or used + len(candidate["text"]) > budget:
+            continue
+        selected.append({**candidate, "score": round(score, 4)})
+        used += len(candidate["text"])
+    return selected
@@ -6,7 +6,7 @@ import os
 from typing import List, Dict, Any
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams
-from utils.logger import logger
+from mcp_service.utils.logger import logger
 import httpx
 
 # Qdrant Configuration
@@ -0,0 +1,214 @@
+"""
+Schema Context for SQL Generation
+Introspects the database schema from pg_catalog and prunes it to the tables
+and columns relevant to a question, so prompt size stays flat as tables grow
+"""
+import os
+import re
+import time
+import threading
+from typing import Dict, Any, List, Optional, Set
+import psycopg2
+from mcp_service.utils.logger import logger
+
+SCHEMA_NAMESPACE = os.getenv("SQL_SCHEMA_NAMESPACE", "public")
+SCHEMA_REFRESH_SECONDS = int(os.getenv("SQL_SCHEMA_REFRESH_SECONDS", "300"))
+# Only these tables are offered to the SQL generator (empty = every table not excluded)
+SCHEMA_INCLUDE_TABLES = {
+    t.strip() for t in os.getenv("SQL_SCHEMA_INCLUDE_TABLES", "").split(",") if t.strip()
+}
+# Never offered, even if listed above: the backend's private chat data lives in the same database
+SCHEMA_EXCLUDE_TABLES = {
+    t.strip() for t in os.getenv(
+        "SQL_SCHEMA_EXCLUDE_TABLES", "conversation_history,conversation_summary,conversation_history_legacy"
+    ).split(",") if t.strip()
+}
+SCHEMA_MAX_COLUMNS = int(os.getenv("SQL_SCHEMA_MAX_COLUMNS", "12"))
+SCHEMA_SAMPLE_VALUES = os.getenv("SQL_SCHEMA_SAMPLE_VALUES", "true").lower() == "true"
+SCHEMA_SAMPLE_MAX_DISTINCT = 20
+
+COLUMNS_SQL = """
+SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod)
+FROM pg_attribute a
+JOIN pg_class c ON c.oid = a.attrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = %(schema)s
+  AND c.relkind IN ('r', 'p', 'v', 'm')
+  AND NOT c.relispartition
+  AND a.attnum > 0
+  AND NOT a.attisdropped
+ORDER BY c.relname, a.attnum
+"""
+
+CONSTRAINTS_SQL = """
+SELECT c.relname, con.contype, a.attname, fc.relname, fa.attname
+FROM pg_constraint con
+JOIN pg_class c ON c.oid = con.conrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = con.conkey[1]
+LEFT JOIN pg_class fc ON fc.oid = con.confrelid
+LEFT JOIN pg_attribute fa ON fa.attrelid = con.confrelid AND fa.attnum = con.confkey[1]
+WHERE n.nspname = %(schema)s
+  AND con.contype IN ('p', 'f')
+  AND array_length(con.conkey, 1) = 1
+"""
+
+# Planner statistics give low-cardinality sample values without scanning tables
+SAMPLES_SQL = """
+SELECT tablename, attname, most_common_vals::text
+FROM pg_stats
+WHERE schemaname = %(schema)s
+  AND n_distinct > 0
+  AND n_distinct <= %(max_distinct)s
+  AND most_common_vals IS NOT NULL
+"""
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "by", "and", "or", "is", "are",
+    "was", "were", "how", "many", "much", "what", "which", "who", "show", "list",
+    "me", "all", "with", "from", "at", "do", "does", "have", "has", "there", "get",
+}
+
+
+def _tokens(text: str) -> Set[str]:
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    tokens = set()
+    for word in words:
+        if word in STOPWORDS:
+            continue
+        tokens.add(word)
+        if len(word) > 3 and word.endswith("s"):
+            tokens.add(word[:-1])
+    return tokens
+
+
+def _parse_pg_array(value: str) -> List[str]:
+    items = re.findall(r'"((?:[^"\\]|\\.)*)"|([^,{}]+)', value or "")
+    return [quoted or bare for quoted, bare in items]
+
+
+class SchemaContext:
+    """
+    Cached, introspected schema with per-question pruning
+
+    Features:
+    - Reads tables, columns, primary/foreign keys from pg_catalog
+    - Refreshes every SQL_SCHEMA_REFRESH_SECONDS (falls back to the last good schema)
+    - Optional per-column sample values from pg_stats
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._schema: Optional[Dict[str, Dict[str, Any]]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _introspect(self) -> Dict[str, Dict[str, Any]]:
+        params = {"schema": SCHEMA_NAMESPACE, "max_distinct": SCHEMA_SAMPLE_MAX_DISTINCT}
+        conn = psycopg2.connect(self.dsn)
+        try:
+            cur = conn.cursor()
+            tables: Dict[str, Dict[str, Any]] = {}
+
+            cur.execute(COLUMNS_SQL, params)
+            for table, column, col_type in cur.fetchall():
+                if table in SCHEMA_EXCLUDE_TABLES or (SCHEMA_INCLUDE_TABLES and table not in SCHEMA_INCLUDE_TABLES):
+                    continue
+                entry = tables.setdefault(table, {"columns": {}, "primary_key": None, "foreign_keys": {}, "samples": {}})
+                entry["columns"][column] = col_type
+
+            cur.execute(CONSTRAINTS_SQL, params)
+            for table, contype, column, ref_table, ref_column in cur.fetchall():
+                if table not in tables:
+                    continue
+                if contype == "p":
+                    tables[table]["primary_key"] = column
+                else:
+                    tables[table]["foreign_keys"][column] = (ref_table, ref_column)
+
+            if SCHEMA_SAMPLE_VALUES:
+                cur.execute(SAMPLES_SQL, params)
+                for table, column, values in cur.fetchall():
+                    if table in tables and column in tables[table]["columns"]:
+                        tables[table]["samples"][column] = _parse_pg_array(values)[:5]
+
+            cur.close()
+            return tables
+        finally:
+            conn.close()
+
+    def get_schema(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Return the cached schema, refreshing it when older than the refresh interval"""
+        with self._lock:
+            if self._schema is not None and time.monotonic() - self._loaded_at < SCHEMA_REFRESH_SECONDS:
+                return self._schema
+            try:
+                self._schema = self._introspect()
+                logger.info(f"[schema_context] Introspected {len(self._schema)} tables")
+            except Exception as e:
+                logger.warning(f"[schema_context] Schema introspection failed: {e}")
+            # Back off for a full interval on failure too, keeping the last good schema
+            self._loaded_at = time.monotonic()
+            return self._schema
+
+    def refresh(self):
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def _select_tables(self, schema: Dict[str, Dict[str, Any]], tokens: Set[str]) -> List[str]:
+        selected = []
+        for table, info in schema.items():
+            table_tokens = _tokens(table.replace("_", " "))
+            column_tokens = set()
+            for column in info["columns"]:
+                # Key columns (user_id, id) name other tables, not this one's content
+                if column == info["primary_key"] or column in info["foreign_keys"]:
+                    continue
+                column_tokens |= _tokens(column.replace("_", " "))
+            if tokens & table_tokens or tokens & column_tokens:
+                selected.append(table)
+
+        if not selected:
+            return sorted(schema)
+
+        # Pull in referenced tables so joins on foreign keys remain possible
+        for table in list(selected):
+            for ref_table, _ in schema[table]["foreign_keys"].values():
+                if ref_table in schema and ref_table not in selected:
+                    selected.append(ref_table)
+        return sorted(selected)
+
+    def _select_columns(self, info: Dict[str, Any], tokens: Set[str]) -> List[str]:
+        columns = list(info["columns"])
+        if len(columns) <= SCHEMA_MAX_COLUMNS:
+            return columns
+        keep = {info["primary_key"], *info["foreign_keys"]}
+        keep |= {c for c in columns if tokens & _tokens(c.replace("_", " "))}
+        return [c for c in columns if c in keep]
+
+    def render(self, question: str) -> Optional[str]:
+        """Render the pruned schema for a question, or None when introspection is unavailable"""
+        schema = self.get_schema()
+        if not schema:
+            return None
+
+        tokens = _tokens(question)
+        blocks = []
+        for table in self._select_tables(schema, tokens):
+            info = schema[table]
+            columns = self._select_columns(info, tokens)
+            lines = []
+            for idx, column in enumerate(columns):
+                line = f"    {column} {info['columns'][column]}"
+                if column == info["primary_key"]:
+                    line += " PRIMARY KEY"
+                if column in info["foreign_keys"]:
+                    ref_table, ref_column = info["foreign_keys"][column]
+                    line += f" REFERENCES {ref_table}({ref_column})"
+                if idx < len(columns) - 1:
+                    line += ","
+                if column in info["samples"]:
+                    line += " -- e.g. " + ", ".join(f"'{v}'" for v in info["samples"][column])
+                lines.append(line)
+            blocks.append(f"TABLE {table} (\n" + "\n".join(lines) + "\n)")
+        return "\n\n".join(blocks)
@@ -0,0 +1,374 @@
+"""
+SQL Result Cache for MCP Service
+Caches read-only query results keyed by normalized SQL with table-level invalidation
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Iterable
+from redis import Redis
+from mcp_service.utils.logger import logger
+
+# Cache Configuration
+SQL_CACHE_ENABLED = os.getenv("SQL_CACHE_ENABLED", "true").lower() == "true"
+SQL_CACHE_DEFAULT_TTL = int(os.getenv("SQL_CACHE_TTL_SECONDS", "60"))
+SQL_CACHE_TABLE_TTLS = os.getenv("SQL_CACHE_TABLE_TTLS", "users=300,orders=30,user_sessions=15")
+SQL_CACHE_MAX_ENTRIES = int(os.getenv("SQL_CACHE_MAX_ENTRIES", "512"))
+SQL_CACHE_MAX_ENTRY_BYTES = int(os.getenv("SQL_CACHE_MAX_ENTRY_BYTES", str(256 * 1024)))
+SQL_CACHE_REDIS_URL = os.getenv("SQL_CACHE_REDIS_URL")
+SQL_CACHE_NOTIFY_CHANNEL = os.getenv("SQL_CACHE_NOTIFY_CHANNEL", "sql_cache_invalidate")
+
+REDIS_PREFIX = "sql_cache"
+
+# Table extraction works on tokens with string literals and comments removed
+SQL_TOKEN = re.compile(r'"[^"]*"|[A-Za-z_][A-Za-z0-9_$]*|\d+(?:\.\d+)?|\S')
+SQL_IDENT = re.compile(r'"[^"]*"|[A-Za-z_][A-Za-z0-9_$]*')
+# Keywords that end a FROM clause at its own nesting level
+FROM_CLAUSE_END = {
+    "where", "group", "having", "order", "limit", "offset", "union", "intersect", "except",
+    "window", "fetch", "for", "returning", ";",
+}
+JOIN_MODIFIERS = {"natural", "inner", "left", "right", "full", "outer", "cross", "lateral", "only"}
+# Functions whose arguments use FROM as a keyword (extract(year from ts))
+FROM_ARG_FUNCTIONS = {"extract", "substring", "substr", "trim", "overlay"}
+
+
+def _parse_table_ttls(spec: str) -> Dict[str, int]:
+    ttls = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        table, ttl = item.split("=", 1)
+        try:
+            ttls[table.strip().lower()] = int(ttl)
+        except ValueError:
+            logger.warning(f"[sql_cache] Ignoring invalid TTL for {table!r}: {ttl!r}")
+    return ttls
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside string literals and drop trailing semicolons"""
+    parts = re.split(r"('(?:[^']|'')*')", sql.strip())
+    normalized = "".join(
+        part if part.startswith("'") else re.sub(r'\s+', ' ', part)
+        for part in parts
+    )
+    return normalized.strip().rstrip(";").strip()
+
+
+def _split_top_level(tokens: List[str], separators: set) -> List[List[str]]:
+    """Split tokens on separators that are not inside parentheses"""
+    parts, current, depth = [], [], 0
+    for token in tokens:
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        if depth == 0 and token.lower() in separators:
+            parts.append(current)
+            current = []
+        else:
+            current.append(token)
+    parts.append(current)
+    return parts
+
+
+def _closing_paren(tokens: List[str], start: int) -> int:
+    depth = 0
+    for i in range(start, len(tokens)):
+        if tokens[i] == "(":
+            depth += 1
+        elif tokens[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def _parse_from_list(tokens: List[str], tables: set) -> bool:
+    """
+    Add the tables of a FROM list (comma-separated items, each possibly with JOINs) to tables
+    Returns False when an item is not understood, e.g. a set-returning function call
+    """
+    for item in _split_top_level(tokens, {","}):
+        for ref in _split_top_level(item, {"join"}):
+            while ref and ref[0].lower() in JOIN_MODIFIERS:
+                ref = ref[1:]
+            ref = _split_top_level(ref, {"on", "using"})[0]
+            if not ref:
+                return False
+            if ref[0] == "(":
+                end = _closing_paren(ref, 0)
+                if end < 0:
+                    return False
+                inner = ref[1:end]
+                # Subqueries are scanned by extract_tables itself; parenthesized joins are parsed here
+                if inner and inner[0].lower() not in ("select", "with", "values") and not _parse_from_list(inner, tables):
+                    return False
+                continue
+            name, i = [], 0
+            while i < len(ref) and SQL_IDENT.fullmatch(ref[i]):
+                name.append(ref[i])
+                if i + 1 < len(ref) and ref[i + 1] == ".":
+                    i += 2
+                    continue
+                i += 1
+                break
+            if not name or (i < len(ref) and ref[i] == "("):
+                return False  # not a table name, or a function in FROM
+            tables.add(name[-1].strip('"').lower())
+    return True
+
+
+def extract_tables(sql: str) -> Optional[List[str]]:
+    """
+    Return the lowercased table names referenced in FROM/JOIN clauses (including comma lists
+    and subqueries), or None when the FROM clause cannot be fully understood
+    """
+    text = re.sub(r"'(?:[^']|'')*'", "''", sql)
+    text = re.sub(r"--[^\n]*|/\*.*?\*/", " ", text, flags=re.DOTALL)
+    tokens = SQL_TOKEN.findall(text)
+    tables: set = set()
+    openers: List[int] = []  # index of each enclosing "("
+    for i, token in enumerate(tokens):
+        if token == "(":
+            openers.append(i)
+            continue
+        if token == ")":
+            if openers:
+                openers.pop()
+            continue
+        if token.lower() != "from":
+            continue
+        if i > 0 and tokens[i - 1].lower() == "distinct":
+            continue  # IS [NOT] DISTINCT FROM
+        if openers and openers[-1] > 0 and tokens[openers[-1] - 1].lower() in FROM_ARG_FUNCTIONS:
+            continue
+        clause, depth = [], 0
+        for token in tokens[i + 1:]:
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+                if depth < 0:
+                    break
+            elif depth == 0 and token.lower() in FROM_CLAUSE_END:
+                break
+            clause.append(token)
+        if not _parse_from_list(clause, tables):
+            return None
+    return sorted(tables)
+
+
+class SQLResultCache:
+    """
+    Two-tier cache for read-only SQL results
+
+    Features:
+    - In-process LRU with per-table TTLs (entry TTL = shortest TTL of referenced tables)
+    - Shared Redis tier (when SQL_CACHE_REDIS_URL is set) with per-table key sets for invalidation
+    - Queries whose referenced tables cannot be determined are not cached
+    - Results larger than SQL_CACHE_MAX_ENTRY_BYTES are never cached
+    """
+
+    def __init__(self):
+        self.enabled = SQL_CACHE_ENABLED
+        self.table_ttls = _parse_table_ttls(SQL_CACHE_TABLE_TTLS)
+        self.max_entries = SQL_CACHE_MAX_ENTRIES
+        self.max_entry_bytes = SQL_CACHE_MAX_ENTRY_BYTES
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.redis = self._init_redis()
+
+    def _init_redis(self):
+        if not SQL_CACHE_REDIS_URL:
+            return None
+        try:
+            client = Redis.from_url(SQL_CACHE_REDIS_URL, decode_responses=True)
+            client.ping()
+            logger.info("[sql_cache] Redis tier enabled")
+            return client
+        except Exception as e:
+            logger.warning(f"[sql_cache] Redis unavailable, using in-process cache only: {e}")
+            return None
+
+    def _key(self, sql: str, params: Optional[Dict[str, Any]]) -> str:
+        raw = normalize_sql(sql) + "\x00" + json.dumps(params or {}, sort_keys=True, default=_json_default)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _ttl_for(self, tables: Iterable[str]) -> int:
+        ttls = [self.table_ttls.get(t, SQL_CACHE_DEFAULT_TTL) for t in tables]
+        return min(ttls) if ttls else SQL_CACHE_DEFAULT_TTL
+
+    def get(self, sql: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Return a cached result dict, or None on miss"""
+        if not self.enabled:
+            return None
+        key = self._key(sql, params)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                if entry["expires_at"] > now:
+                    self._entries.move_to_end(key)
+                    return json.loads(entry["payload"])
+                del self._entries[key]
+
+        if self.redis:
+            try:
+                payload = self.redis.get(f"{REDIS_PREFIX}:entry:{key}")
+                if payload:
+                    ttl = self.redis.ttl(f"{REDIS_PREFIX}:entry:{key}")
+                    self._store_local(key, payload, extract_tables(sql) or [], ttl if ttl and ttl > 0 else None)
+                    return json.loads(payload)
+            except Exception as e:
+                logger.warning(f"[sql_cache] Redis read failed: {e}")
+        return None
+
+    def set(self, sql: str, params: Optional[Dict[str, Any]], result: Dict[str, Any]):
+        """Cache a successful read-only result unless it exceeds the byte cap"""
+        if not self.enabled:
+            return
+        if not normalize_sql(sql).upper().startswith(("SELECT", "WITH")):
+            return
+
+        payload = json.dumps(result, default=_json_default)
+        if len(payload.encode("utf-8")) > self.max_entry_bytes:
+            logger.info(f"[sql_cache] Result too large to cache ({len(payload)} bytes)")
+            return
+
+        tables = extract_tables(sql)
+        if not tables:
+            # Invalidation is per table: a result whose tables are not all known cannot be cached,
+            # and a table-less query (SELECT now()) would never be invalidated
+            logger.info("[sql_cache] Not caching, no known tables to invalidate it by")
+            return
+        key = self._key(sql, params)
+        ttl = self._ttl_for(tables)
+        if ttl <= 0:
+            return
+        self._store_local(key, payload, tables, ttl)
+
+        if self.redis:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.set(f"{REDIS_PREFIX}:entry:{key}", payload, ex=ttl)
+                for table in tables:
+                    pipe.sadd(f"{REDIS_PREFIX}:table:{table}", key)
+                    pipe.expire(f"{REDIS_PREFIX}:table:{table}", self._ttl_for([table]))
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"[sql_cache] Redis write failed: {e}")
+
+    def _store_local(self, key: str, payload: str, tables: List[str], ttl: Optional[int]):
+        ttl = ttl if ttl is not None else self._ttl_for(tables)
+        with self._lock:
+            self._entries[key] = {
+                "payload": payload,
+                "tables": set(tables),
+                "expires_at": time.monotonic() + ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_tables(self, tables: Optional[Iterable[str]] = None) -> int:
+        """
+        Drop cached results that reference any of the given tables
+        Passing None drops everything. Returns the number of local entries removed.
+        """
+        targets = {t.lower() for t in tables} if tables is not None else None
+
+        with self._lock:
+            if targets is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                stale = [k for k, v in self._entries.items() if v["tables"] & targets]
+                for k in stale:
+                    del self._entries[k]
+                removed = len(stale)
+
+        if self.redis:
+            try:
+                if targets is None:
+                    keys = list(self.redis.scan_iter(f"{REDIS_PREFIX}:*"))
+                    if keys:
+                        self.redis.delete(*keys)
+                else:
+                    for table in targets:
+                        set_key = f"{REDIS_PREFIX}:table:{table}"
+                        members = self.redis.smembers(set_key)
+                        pipe = self.redis.pipeline()
+                        for key in members:
+                            pipe.delete(f"{REDIS_PREFIX}:entry:{key}")
+                        pipe.delete(set_key)
+                        pipe.execute()
+            except Exception as e:
+                logger.warning(f"[sql_cache] Redis invalidation failed: {e}")
+
+        logger.info(f"[sql_cache] Invalidated {removed} entries for tables={sorted(targets) if targets else 'ALL'}")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_entry_bytes": self.max_entry_bytes,
+                "redis": self.redis is not None,
+            }
+
+
+def start_invalidation_listener(dsn: str, cache: "SQLResultCache") -> Optional[threading.Thread]:
+    """
+    Listen for Postgres NOTIFY events (see notify_table_change() in db_setup.sql)
+    and invalidate the named table. Runs in a daemon thread and reconnects on error.
+    """
+    if os.getenv("SQL_CACHE_LISTEN", "false").lower() != "true":
+        return None
+
+    import select
+    import psycopg2
+
+    def _listen():
+        while True:
+            try:
+                conn = psycopg2.connect(dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {SQL_CACHE_NOTIFY_CHANNEL};")
+                logger.info(f"[sql_cache] Listening on channel {SQL_CACHE_NOTIFY_CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        cache.invalidate_tables([notify.payload])
+            except Exception as e:
+                logger.warning(f"[sql_cache] Invalidation listener error, reconnecting: {e}")
+                time.sleep(5)
+
+    thread = threading.Thread(target=_listen, name="sql-cache-listener", daemon=True)
+    thread.start()
+    return thread
+
+
+sql_result_cache = SQLResultCache()
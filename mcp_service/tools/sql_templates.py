@@ -0,0 +1,320 @@
+"""
+SQL Template Engine for MCP Service
+Deterministic NL -> SQL fast path for common analytics questions
+"""
+import os
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from mcp_service.utils.logger import logger
+
+# Minimum confidence a template match needs before it is used instead of the LLM
+TEMPLATE_MIN_CONFIDENCE = float(os.getenv("SQL_TEMPLATE_MIN_CONFIDENCE", "0.8"))
+TEMPLATE_DEFAULT_LIMIT = int(os.getenv("SQL_TEMPLATE_DEFAULT_LIMIT", "10"))
+TEMPLATE_MAX_LIMIT = 100
+
+# Entity slot: keyword pattern -> table
+ENTITY_PATTERNS = {
+    "user_sessions": r'\bsessions?\b',
+    "orders": r'\b(orders?|purchases?)\b',
+    "users": r'\b(users?|customers?|accounts?|people)\b',
+}
+
+# Status slot (orders only): keyword -> stored status value
+ORDER_STATUSES = {
+    "pending": "pending",
+    "completed": "completed",
+    "complete": "completed",
+    "shipped": "shipped",
+    "delivered": "delivered",
+    "cancelled": "cancelled",
+    "canceled": "cancelled",
+    "refunded": "refunded",
+    "processing": "processing",
+}
+
+# Phrases that ask for something the templates cannot express
+# (checked on what is left once the matched slots are removed)
+UNSUPPORTED_PATTERNS = [
+    r'\b(average|avg|mean|median)\b',
+    r'\b(per|each)\b',
+    r'\b(email|name|named)\b',
+    r'\b(more|less|greater|fewer) than\b',
+    r'\b(over|under|above|below|between|exceeding|at least|at most)\b',
+    r'\b(not|no|without|never|except|excluding|isn\'t|aren\'t|wasn\'t|weren\'t)\b',
+    r'\b(from|for|by)\b',
+    r'\bcompare|compared|versus|vs\b',
+    r'\bwhere\b',
+    r'@',
+]
+
+# Words that neither filter nor select anything; any other word left over after slot
+# extraction (a name, a country, a number, "active" without a time range, ...) is a
+# condition the template would silently drop, so the question goes to the LLM instead
+FILLER_WORDS = {
+    "a", "an", "the", "of", "in", "on", "to", "is", "are", "was", "were", "be", "been",
+    "what", "whats", "what's", "there's", "which", "me", "all", "do", "does", "did", "have", "has", "had", "there",
+    "we", "our", "us", "i", "my", "you", "can", "could", "would", "please", "show", "list",
+    "give", "get", "tell", "find", "display", "with", "and", "at", "so", "far", "now", "right",
+    "currently", "ever", "overall", "total", "number", "how", "many", "much", "count",
+    "placed", "made", "created", "registered", "signed", "up", "joined", "exist", "exists",
+    "existing", "recorded", "system", "database", "s",
+}
+
+# Optional preposition in front of a time range ("in the last 7 days", "for this month")
+TIME_PREFIX = r'(?:\b(?:in|for|during|over|within|from|since)\s+)?(?:the\s+)?'
+
+LIMIT_PATTERNS = [
+    r'\b(?:top|first|last|latest|recent|newest|largest|biggest)\s+(\d+)\b(?!\s*(?:hours?|days?|weeks?|months?|years?)\b)',
+    r'\b(\d+)\s+(?:most recent|latest|newest|largest|biggest|highest)\b',
+]
+
+COUNT_PATTERN = r'\b(how many|count|number of|total number)\b'
+TOP_PATTERN = r'\b(top|largest|biggest|highest|most expensive)\b'
+SPEND_PATTERN = r'\b(spend|spent|spending|spenders?|revenue|amount|value)\b'
+# "by spend" / "by total amount" name the ranking the top templates already use
+RANK_BY_PATTERN = r'\bby\s+(?:total\s+)?(?:spend|spent|spending|revenue|amount|value|order value)\b'
+BREAKDOWN_PATTERN = r'\b(by status|per status|status breakdown|breakdown|distribution|grouped by status)\b'
+REVENUE_PATTERN = r'\b(total|sum of)\b.*\b(revenue|sales|amount|order value)\b|\brevenue\b'
+RECENT_PATTERN = r'\b(list|show|latest|recent|newest|last)\b'
+LOGIN_PATTERN = r'\b(logged in|log in|login|logins|active)\b'
+
+
+def _extract_entities(query: str) -> List[str]:
+    return [table for table, pattern in ENTITY_PATTERNS.items() if re.search(pattern, query)]
+
+
+def _extract_status(query: str) -> Optional[str]:
+    for word, status in ORDER_STATUSES.items():
+        if re.search(rf'\b{word}\b', query):
+            return status
+    return None
+
+
+def _extract_limit(query: str) -> Optional[int]:
+    for pattern in LIMIT_PATTERNS:
+        match = re.search(pattern, query)
+        if match:
+            return max(1, min(int(match.group(1)), TEMPLATE_MAX_LIMIT))
+    return None
+
+
+def _extract_time_range(query: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Return a (condition, params, phrase) triple where condition contains a {col}
+    placeholder for the timestamp column and phrase is the matched text,
+    or None when no range is mentioned
+    """
+    match = re.search(rf'{TIME_PREFIX}\btoday\b', query)
+    if match:
+        return "{col} >= date_trunc('day', NOW())", {}, match.group(0)
+    match = re.search(rf'{TIME_PREFIX}\byesterday\b', query)
+    if match:
+        return ("{col} >= date_trunc('day', NOW()) - INTERVAL '1 day' "
+                "AND {col} < date_trunc('day', NOW())"), {}, match.group(0)
+
+    match = re.search(rf'{TIME_PREFIX}\bthis (week|month|year)\b', query)
+    if match:
+        return f"{{col}} >= date_trunc('{match.group(1)}', NOW())", {}, match.group(0)
+
+    match = re.search(rf'{TIME_PREFIX}\b(?:last|past|previous)\s+(\d+)\s+(hour|day|week|month|year)s?\b', query)
+    if match:
+        return ("{col} >= NOW() - %(interval)s::interval",
+                {"interval": f"{int(match.group(1))} {match.group(2)}s"}, match.group(0))
+
+    match = re.search(rf'{TIME_PREFIX}\b(?:last|past|previous)\s+(hour|day|week|month|year)\b', query)
+    if match:
+        return "{col} >= NOW() - %(interval)s::interval", {"interval": f"1 {match.group(1)}"}, match.group(0)
+
+    return None
+
+
+def _where(conditions: List[str]) -> str:
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _login_column(table: str, query: str) -> Optional[str]:
+    """Timestamp column that "logged in" / "active" refer to, if the question uses them"""
+    if table == "users" and re.search(LOGIN_PATTERN, query):
+        return "last_login_at"
+    if table == "user_sessions" and re.search(r'\bactive\b', query):
+        return "last_activity"
+    return None
+
+
+def _build_count(table: str, query: str, time_range, status) -> Dict[str, Any]:
+    time_col = _login_column(table, query) or "created_at"
+
+    conditions, params = [], {}
+    if time_range:
+        conditions.append(time_range[0].format(col=time_col))
+        params.update(time_range[1])
+    if status:
+        conditions.append("status = %(status)s")
+        params["status"] = status
+
+    sql = f"SELECT COUNT(*) AS count FROM {table}{_where(conditions)}"
+    return {"template": f"count_{table}", "sql": sql, "params": params}
+
+
+def _build_top_orders(time_range, status, limit: int) -> Dict[str, Any]:
+    conditions, params = [], {"limit": limit}
+    if time_range:
+        conditions.append(time_range[0].format(col="o.created_at"))
+        params.update(time_range[1])
+    if status:
+        conditions.append("o.status = %(status)s")
+        params["status"] = status
+
+    sql = ("SELECT o.id, o.user_id, u.name, o.total_amount, o.status, o.created_at "
+           "FROM orders o JOIN users u ON u.id = o.user_id"
+           f"{_where(conditions)} ORDER BY o.total_amount DESC LIMIT %(limit)s")
+    return {"template": "top_orders_by_amount", "sql": sql, "params": params}
+
+
+def _build_top_spenders(time_range, status, limit: int) -> Dict[str, Any]:
+    conditions, params = [], {"limit": limit}
+    if time_range:
+        conditions.append(time_range[0].format(col="o.created_at"))
+        params.update(time_range[1])
+    if status:
+        conditions.append("o.status = %(status)s")
+        params["status"] = status
+
+    sql = ("SELECT u.id, u.name, u.email, COUNT(o.id) AS order_count, SUM(o.total_amount) AS total_spent "
+           "FROM users u JOIN orders o ON o.user_id = u.id"
+           f"{_where(conditions)} GROUP BY u.id, u.name, u.email "
+           "ORDER BY total_spent DESC LIMIT %(limit)s")
+    return {"template": "top_users_by_spend", "sql": sql, "params": params}
+
+
+def _build_status_breakdown(time_range) -> Dict[str, Any]:
+    conditions, params = [], {}
+    if time_range:
+        conditions.append(time_range[0].format(col="created_at"))
+        params.update(time_range[1])
+
+    sql = ("SELECT status, COUNT(*) AS count, SUM(total_amount) AS total_amount FROM orders"
+           f"{_where(conditions)} GROUP BY status ORDER BY count DESC")
+    return {"template": "orders_status_breakdown", "sql": sql, "params": params}
+
+
+def _build_revenue(time_range, status) -> Dict[str, Any]:
+    conditions, params = [], {}
+    if time_range:
+        conditions.append(time_range[0].format(col="created_at"))
+        params.update(time_range[1])
+    if status:
+        conditions.append("status = %(status)s")
+        params["status"] = status
+
+    sql = ("SELECT COALESCE(SUM(total_amount), 0) AS total_amount, COUNT(*) AS order_count FROM orders"
+           f"{_where(conditions)}")
+    return {"template": "orders_total_amount", "sql": sql, "params": params}
+
+
+def _build_recent(table: str, time_range, status, limit: int) -> Dict[str, Any]:
+    conditions, params = [], {"limit": limit}
+    if time_range:
+        conditions.append(time_range[0].format(col="created_at"))
+        params.update(time_range[1])
+    if status:
+        conditions.append("status = %(status)s")
+        params["status"] = status
+
+    columns = "id, user_id, created_at, last_activity" if table == "user_sessions" else "*"
+    sql = f"SELECT {columns} FROM {table}{_where(conditions)} ORDER BY created_at DESC LIMIT %(limit)s"
+    return {"template": f"recent_{table}", "sql": sql, "params": params}
+
+
+def _unmatched(q: str, consumed: List[str]) -> Tuple[List[str], bool]:
+    """
+    Remove the phrases the chosen template understood; return the leftover content words
+    and whether the leftover asks for something templates cannot express
+    """
+    residual = q
+    for pattern in consumed:
+        residual = re.sub(pattern, " ", residual)
+    unsupported = any(re.search(pattern, residual) for pattern in UNSUPPORTED_PATTERNS)
+    words = [w for w in re.findall(r"[a-z0-9]+(?:'[a-z]+)?", residual) if w not in FILLER_WORDS]
+    return words, unsupported
+
+
+def match_sql_template(query: str) -> Optional[Dict[str, Any]]:
+    """
+    Match a natural language question against the built-in SQL templates
+
+    Returns:
+        Dictionary with template name, parameterized SQL, params and confidence,
+        or None when no template matches with at least TEMPLATE_MIN_CONFIDENCE
+    """
+    q = query.lower().strip()
+    entities = _extract_entities(q)
+    if not entities:
+        return None
+
+    status = _extract_status(q)
+    time_range = _extract_time_range(q)
+    limit = _extract_limit(q)
+
+    # A status only makes sense for orders
+    if status and "orders" not in entities:
+        return None
+
+    match = None
+    if "orders" in entities and re.search(BREAKDOWN_PATTERN, q) and "status" in q:
+        match = _build_status_breakdown(time_range)
+    elif re.search(TOP_PATTERN, q) and "users" in entities and re.search(SPEND_PATTERN, q):
+        match = _build_top_spenders(time_range, status, limit or TEMPLATE_DEFAULT_LIMIT)
+    elif re.search(TOP_PATTERN, q) and entities == ["orders"]:
+        match = _build_top_orders(time_range, status, limit or TEMPLATE_DEFAULT_LIMIT)
+    elif re.search(COUNT_PATTERN, q) and len(entities) == 1:
+        match = _build_count(entities[0], q, time_range, status)
+    elif entities == ["orders"] and re.search(REVENUE_PATTERN, q):
+        match = _build_revenue(time_range, status)
+    elif re.search(RECENT_PATTERN, q) and len(entities) == 1 and (limit or time_range or re.search(r'\b(latest|recent|newest)\b', q)):
+        match = _build_recent(entities[0], time_range, status, limit or TEMPLATE_DEFAULT_LIMIT)
+
+    if not match:
+        return None
+
+    # Phrases the chosen template turned into SQL; anything else in the question is a
+    # condition it would drop
+    template = match["template"]
+    consumed = []
+    if template.startswith("count_") and time_range and _login_column(entities[0], q):
+        # Before the time range, whose optional preposition would split "logged in today"
+        consumed.append(LOGIN_PATTERN)
+    if time_range:
+        consumed.append(TIME_PREFIX + re.escape(re.sub(rf'^{TIME_PREFIX}', '', time_range[2])))
+    consumed += [ENTITY_PATTERNS[table] for table in entities]
+    consumed += LIMIT_PATTERNS
+    if status and template != "orders_status_breakdown":
+        consumed += [rf'\b{word}\b' for word, value in ORDER_STATUSES.items() if value == status]
+    if template == "orders_status_breakdown":
+        consumed += [BREAKDOWN_PATTERN, r'\bstatus(es)?\b']
+    elif template in {"top_users_by_spend", "top_orders_by_amount"}:
+        consumed += [RANK_BY_PATTERN, TOP_PATTERN, SPEND_PATTERN]
+    elif template.startswith("count_"):
+        consumed.append(COUNT_PATTERN)
+    elif template == "orders_total_amount":
+        consumed.append(r'\b(total|sum of|sum|revenue|sales|amount|order value)\b')
+    elif template.startswith("recent_"):
+        consumed.append(RECENT_PATTERN)
+    unmatched, unsupported = _unmatched(q, consumed)
+
+    confidence = 1.0
+    if unsupported:
+        confidence -= 0.5
+    if unmatched:
+        confidence -= 0.5
+        match["unmatched"] = unmatched
+    if len(entities) > 1 and match["template"] not in {"top_users_by_spend", "top_orders_by_amount"}:
+        confidence -= 0.3
+    match["confidence"] = round(confidence, 2)
+
+    if confidence < TEMPLATE_MIN_CONFIDENCE:
+        logger.info(f"[sql_templates] Low-confidence match {match['template']} ({confidence:.2f}, "
+                    f"unmatched: {match.get('unmatched', [])}), deferring to LLM")
+        return None
+
+    return match
@@ -1,46 +1,143 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
+from urllib.parse import urlparse, quote_plus
+import asyncio
+import os
 import httpx
 import json
 from bs4 import BeautifulSoup
-from utils.logger import logger
+from mcp_service.utils.logger import logger
+from mcp_service.tools.http_cache import web_cache
+from mcp_service.tools.html_text import VisibleTextParser, is_text_content
+from mcp_service.tools.passages import split_passages, select_passages
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Web Plan Executor Configuration
+WEB_REQUEST_TIMEOUT = float(os.getenv("WEB_REQUEST_TIMEOUT", "10"))
+WEB_PLAN_TIME_BUDGET = float(os.getenv("WEB_PLAN_TIME_BUDGET", "15"))
+WEB_PER_HOST_CONCURRENCY = int(os.getenv("WEB_PER_HOST_CONCURRENCY", "2"))
+WEB_MAX_CONNECTIONS = int(os.getenv("WEB_MAX_CONNECTIONS", "10"))
+WEB_MAX_QUERIES = 3
+WEB_MAX_PAGE_BYTES = int(os.getenv("WEB_MAX_PAGE_BYTES", str(512 * 1024)))
+WEB_MAX_SEARCH_BYTES = 2 * 1024 * 1024
+WEB_PAGE_TEXT_CHARS = int(os.getenv("WEB_PAGE_TEXT_CHARS", "6000"))
+WEB_EMBED_TIMEOUT = float(os.getenv("WEB_EMBED_TIMEOUT", "5"))
+
+
+def _search_url(query: str) -> str:
+    return f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
+
+
+def _parse_search_results(html: str, max_results: int) -> List[Dict[str, Any]]:
+    soup = BeautifulSoup(html, "html.parser")
+    results = []
+
+    for result in soup.find_all("div", class_="result", limit=max_results):
+        try:
+            title_elem = result.find("a", class_="result__a")
+            snippet_elem = result.find("a", class_="result__snippet")
+
+            if title_elem:
+                title = title_elem.get_text(strip=True)
+                url = title_elem.get("href", "")
+                snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
+
+                results.append({
+                    "url": url,
+                    "title": title,
+                    "snippet": snippet,
+                })
+        except Exception as e:
+            logger.warning(f"Error parsing search result: {e}")
+            continue
+
+    return results
+
+
+class _SearchSink:
+    """Buffers the whole search results page, then parses it"""
+
+    def __init__(self, max_results: int):
+        self.max_results = max_results
+        self.max_bytes = WEB_MAX_SEARCH_BYTES
+        self.done = False
+        self._chunks: List[str] = []
+
+    def feed(self, text: str):
+        self._chunks.append(text)
+
+    def result(self) -> List[Dict[str, Any]]:
+        return _parse_search_results("".join(self._chunks), self.max_results)
+
+
+class _PageSink(VisibleTextParser):
+    """Visible-text extractor capped at WEB_MAX_PAGE_BYTES of downloaded body"""
+
+    def __init__(self, max_length: int):
+        super().__init__(max_length)
+        self.max_bytes = WEB_MAX_PAGE_BYTES
+
+
+def _search_key(query: str, max_results: int) -> str:
+    return f"search:{max_results}:{' '.join(query.lower().split())}"
+
+
+def _page_key(url: str, max_length: int) -> str:
+    return f"page:{max_length}:{url}"
+
+
+def _start_response(kind: str, key: str, entry: Optional[Dict[str, Any]], response: httpx.Response) -> Optional[Any]:
+    """Handle status and content type before reading the body; returns a body to short-circuit with"""
+    if response.status_code == 304 and entry:
+        web_cache.touch(key, kind)
+        return entry["body"]
+    response.raise_for_status()
+    content_type = response.headers.get("content-type", "")
+    if not is_text_content(content_type):
+        logger.info(f"Skipping non-text response ({content_type}) from {response.url}")
+        return ""
+    return None
+
+
+def _cached_get(kind: str, key: str, url: str, make_sink: Callable[[], Any], allow_stale: bool = True) -> Any:
+    """
+    GET through the persistent cache: fresh entries skip the network, stale
+    searches are served while a background thread revalidates, and expired
+    entries are revalidated with If-None-Match/If-Modified-Since.
+    The body is streamed into the sink until it is done or hits its byte cap.
+    """
+    entry = web_cache.lookup(key, kind)
+    if entry and entry["fresh"]:
+        return entry["body"]
+    if entry and allow_stale and entry["stale_usable"]:
+        web_cache.revalidate_in_background(key, lambda: _cached_get(kind, key, url, make_sink, allow_stale=False))
+        return entry["body"]
+
+    sink = make_sink()
+    headers = {**HEADERS, **web_cache.conditional_headers(entry)}
+    with httpx.Client(timeout=WEB_REQUEST_TIMEOUT) as client:
+        with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
+            early = _start_response(kind, key, entry, response)
+            if early is not None:
+                return early
+            for text in response.iter_text():
+                sink.feed(text)
+                if sink.done or response.num_bytes_downloaded >= sink.max_bytes:
+                    break
+    body = sink.result()
+    web_cache.store(key, kind, url, body, response.headers)
+    return body
+
 
 def search_duckduckgo(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
     """
     Search using DuckDuckGo HTML scraping (no API key required).
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        url = f"https://html.duckduckgo.com/html/?q={query}"
-
-        with httpx.Client(timeout=20.0) as client:
-            response = client.get(url, headers=headers, follow_redirects=True)
-            response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        results = []
-
-        for result in soup.find_all("div", class_="result", limit=max_results):
-            try:
-                title_elem = result.find("a", class_="result__a")
-                snippet_elem = result.find("a", class_="result__snippet")
-
-                if title_elem:
-                    title = title_elem.get_text(strip=True)
-                    url = title_elem.get("href", "")
-                    snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
-
-                    results.append({
-                        "url": url,
-                        "title": title,
-                        "snippet": snippet,
-                    })
-            except Exception as e:
-                logger.warning(f"Error parsing search result: {e}")
-                continue
-
-        return results
+        return _cached_get("search", _search_key(query, max_results), _search_url(query),
+                           lambda: _SearchSink(max_results))
     except Exception as e:
         logger.error(f"DuckDuckGo search failed: {e}")
         return []
@@ -50,37 +147,104 @@ def fetch_url_content(url: str, max_length: int = 2000) -> str:
     Fetch and extract text content from a URL.
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        with httpx.Client(timeout=20.0) as client:
-            response = client.get(url, headers=headers, follow_redirects=True)
-            response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-
-        # Get text
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-
-        return text[:max_length]
+        return _cached_get("page", _page_key(url, max_length), url,
+                           lambda: _PageSink(max_length))
+    except Exception as e:
+        logger.error(f"Failed to fetch {url}: {e}")
+        return ""
+
+
+class _HostLimiter:
+    """Per-host semaphores so one slow site cannot take every pooled connection"""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def __call__(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return self._semaphores[host]
+
+
+async def _cached_get_async(client: httpx.AsyncClient, limiter: _HostLimiter, kind: str, key: str,
+                            url: str, make_sink: Callable[[], Any]) -> Any:
+    """Async counterpart of _cached_get over a shared client; cache I/O runs off the event loop"""
+    entry = await asyncio.to_thread(web_cache.lookup, key, kind)
+    if entry and entry["fresh"]:
+        return entry["body"]
+    if entry and entry["stale_usable"]:
+        web_cache.revalidate_in_background(key, lambda: _cached_get(kind, key, url, make_sink, allow_stale=False))
+        return entry["body"]
+
+    sink = make_sink()
+    headers = {**HEADERS, **web_cache.conditional_headers(entry)}
+    async with limiter(url):
+        async with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
+            if response.status_code == 304 and entry:
+                await asyncio.to_thread(web_cache.touch, key, kind)
+                return entry["body"]
+            early = _start_response(kind, key, entry, response)
+            if early is not None:
+                return early
+            async for text in response.aiter_text():
+                sink.feed(text)
+                if sink.done or response.num_bytes_downloaded >= sink.max_bytes:
+                    break
+    body = sink.result()
+    await asyncio.to_thread(web_cache.store, key, kind, url, body, response.headers)
+    return body
+
+
+async def search_duckduckgo_async(client: httpx.AsyncClient, limiter: _HostLimiter,
+                                  query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    """Async DuckDuckGo search over a shared client"""
+    try:
+        return await _cached_get_async(client, limiter, "search", _search_key(query, max_results),
+                                       _search_url(query), lambda: _SearchSink(max_results))
+    except Exception as e:
+        logger.error(f"DuckDuckGo search failed: {e}")
+        return []
+
+
+async def fetch_url_content_async(client: httpx.AsyncClient, limiter: _HostLimiter,
+                                  url: str, max_length: int = 2000) -> str:
+    """Async page fetch and text extraction over a shared client"""
+    try:
+        return await _cached_get_async(client, limiter, "page", _page_key(url, max_length), url,
+                                       lambda: _PageSink(max_length))
     except Exception as e:
         logger.error(f"Failed to fetch {url}: {e}")
         return ""
 
-def execute_web_plan(plan: str) -> List[Dict[str, Any]]:
+
+async def _gather_within(tasks: List[asyncio.Task], deadline: float) -> None:
+    """Wait for tasks until the deadline, cancelling whatever is still running"""
+    if not tasks:
+        return
+    remaining = deadline - asyncio.get_running_loop().time()
+    if remaining > 0:
+        await asyncio.wait(tasks, timeout=remaining)
+    pending = [t for t in tasks if not t.done()]
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"Web plan time budget expired, dropped {len(pending)} pending requests")
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _task_result(task: asyncio.Task, default: Any) -> Any:
+    if task.cancelled() or task.exception() is not None:
+        return default
+    return task.result()
+
+
+def parse_plan_queries(plan: str) -> List[str]:
     """
-    Execute web search based on LLM plan.
-    Extracts search queries from JSON plan and performs web searches.
+    Extract search queries from an LLM plan (JSON, optionally in a markdown fence)
+    Falls back to the plan text itself when no queries can be parsed.
     """
-    logger.info(f"Executing web plan: {plan[:100]}...")
-
     # Extract JSON from markdown code blocks if present
     plan_text = plan.strip()
     if "```json" in plan_text:
@@ -99,7 +263,7 @@ def execute_web_plan(plan: str) -> List[Dict[str, Any]]:
         queries = plan_data.get("queries", [])
         if not queries and "query" in plan_data:
             queries = [plan_data["query"]]
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, AttributeError):
         logger.warning("Failed to parse plan as JSON, using as direct query")
         queries = [plan_text[:200]]
 
@@ -107,24 +271,64 @@ def execute_web_plan(plan: str) -> List[Dict[str, Any]]:
     if not queries:
         queries = [plan_text[:200]]
 
-    # Perform searches for all queries
-    all_results = []
-    for query in queries[:3]:  # Limit to 3 queries
-        results = search_duckduckgo(query, max_results=3)
-
-    # Perform searches for all queries
-    all_results = []
-    for query in queries[:3]:  # Limit to 3 queries
-        results = search_duckduckgo(query, max_results=3)
-        
-        # Fetch content from top result
-        for result in results[:1]:  # Only fetch content from top result per query
-            if result.get("url"):
-                content = fetch_url_content(result["url"], max_length=1000)
-                if content:
-                    result["content"] = content
-        
-        all_results.extend(results)
+    return [q for q in queries if isinstance(q, str) and q.strip()][:WEB_MAX_QUERIES]
+
+
+async def execute_web_plan_async(plan: str, query: Optional[str] = None,
+                                 time_budget: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Execute web search based on LLM plan.
+    All searches run concurrently, then the top page of each search is fetched
+    concurrently over the same pooled client. Whatever has finished when the
+    time budget expires is returned. Fetched pages are reduced to the passages
+    most relevant to the user's query (or the plan's queries if none is given);
+    passage embedding gets what is left of the budget, capped at WEB_EMBED_TIMEOUT.
+    """
+    logger.info(f"Executing web plan: {plan[:100]}...")
+    queries = parse_plan_queries(plan)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (time_budget or WEB_PLAN_TIME_BUDGET)
+    limiter = _HostLimiter(WEB_PER_HOST_CONCURRENCY)
+    limits = httpx.Limits(max_connections=WEB_MAX_CONNECTIONS, max_keepalive_connections=WEB_MAX_CONNECTIONS)
+
+    async with httpx.AsyncClient(timeout=WEB_REQUEST_TIMEOUT, limits=limits) as client:
+        search_tasks = [
+            asyncio.create_task(search_duckduckgo_async(client, limiter, query, max_results=3))
+            for query in queries
+        ]
+        await _gather_within(search_tasks, deadline)
+        per_query = [_task_result(task, []) for task in search_tasks]
+
+        # Fetch content from top result per query
+        targets = [results[0] for results in per_query if results and results[0].get("url")]
+        fetch_tasks = [
+            asyncio.create_task(fetch_url_content_async(client, limiter, result["url"], max_length=WEB_PAGE_TEXT_CHARS))
+            for result in targets
+        ]
+        await _gather_within(fetch_tasks, deadline)
+
+        # Keep only the most relevant passages across all fetched pages
+        candidates = [
+            {"text": passage, "source": idx}
+            for idx, task in enumerate(fetch_tasks)
+            for passage in split_passages(_task_result(task, ""))
+        ]
+        # Ranking counts against the same budget; with none left it scores lexically right away
+        embed_timeout = max(0.0, min(WEB_EMBED_TIMEOUT, deadline - loop.time()))
+        selected = await select_passages(client, query or " ".join(queries), candidates, timeout=embed_timeout)
+        for passage in selected:
+            targets[passage["source"]].setdefault("passages", []).append(
+                {"text": passage["text"], "score": passage["score"]}
+            )
 
+    all_results = [result for results in per_query for result in results]
     logger.info(f"Web search returned {len(all_results)} results")
     return all_results
+
+
+def execute_web_plan(plan: str, query: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Synchronous entry point for execute_web_plan_async (for sync callers).
+    """
+    return asyncio.run(execute_web_plan_async(plan, query))